@@ -1,5 +1,8 @@
 import os
+import asyncio
 import aiofiles
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
 from loguru import logger
 from typing import Dict, Any
@@ -9,19 +12,58 @@ from typing import Dict, Any
 # Strict real-integration mindset applied; no mock endpoints.
 from api.schemas import ChatRequest, ChatResponse
 from services.chat_service import ChatService
+from services.semantic_cache import SemanticCache
 from logic.sync_engine import SyncEngine
+from utils.file_utils import LOCAL_CHECKSUM_ALGO, new_checksum_hasher, write_checksum_sidecar
+from config.settings import settings
 
 router = APIRouter()
 
+# 8MB reads match typical NVMe readahead and cut event-loop <-> thread-pool hops 8x vs 1MB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+def _copy_spooled_upload(src: SpooledTemporaryFile, dest_path: str, hasher: Any):
+    """
+    Copies an upload that Starlette has already rolled over to a temp file on disk,
+    hashing each block on the way through so the file is only read once.
+    Reuses a single 8MB buffer via readinto; runs synchronously, so callers must offload it to a thread.
+    """
+    buffer = bytearray(UPLOAD_CHUNK_SIZE)
+    view = memoryview(buffer)
+    src.seek(0)
+
+    with open(dest_path, 'wb') as dest:
+        while read_bytes := src.readinto(buffer):
+            block = view[:read_bytes]
+            hasher.update(block)
+            dest.write(block)
+
 # ---------------------------------------------------------------------------
 # DEPENDENCY INJECTION
 # ---------------------------------------------------------------------------
+# Process-wide singletons: one AsyncOpenAI keep-alive pool and one SQLite connection
+# are reused across requests instead of paying a TLS handshake / DB open on every call.
+@lru_cache(maxsize=1)
 def get_chat_service() -> ChatService:
     return ChatService()
 
+@lru_cache(maxsize=1)
 def get_sync_engine() -> SyncEngine:
     return SyncEngine()
 
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> SemanticCache:
+    # Process-wide: the cache is only useful if it outlives individual requests
+    return SemanticCache()
+
+async def _ingest_uploaded_file(engine: SyncEngine, file_path: str):
+    """
+    Background ingestion of an uploaded PDF. On success, cached answers may no longer
+    reflect the Vector Store, so the in-process semantic cache is dropped.
+    """
+    if await engine.process_local_file(file_path) and get_semantic_cache.cache_info().currsize:
+        get_semantic_cache().clear()
+
 # ---------------------------------------------------------------------------
 # ENDPOINTS
 # ---------------------------------------------------------------------------
@@ -44,31 +86,45 @@ async def upload_document(
     engine: SyncEngine = Depends(get_sync_engine)
 ):
     """
-    Asynchronously streams uploaded files to local disk in 1MB chunks.
+    Asynchronously streams uploaded files to local disk in 8MB chunks.
     This prevents RAM exhaustion, solving the 13GB massive ingestion bottleneck.
+    Uploads already spooled to disk by Starlette are copied in a single thread hop.
+    The checksum (BLAKE3 when available, else MD5) is computed in the same pass and stored in a sidecar,
+    so ingestion never has to re-read the file to fingerprint it.
     """
     if not file.filename.lower().endswith('.pdf'):
         logger.warning(f"Rejected non-PDF upload attempt: {file.filename}")
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    os.makedirs("temp_data", exist_ok=True)
-    temp_path = os.path.join("temp_data", file.filename)
+    os.makedirs(SyncEngine.UPLOAD_DIR, exist_ok=True)
+    temp_path = os.path.join(SyncEngine.UPLOAD_DIR, os.path.basename(file.filename))
+    
+    hasher = new_checksum_hasher()
     
     try:
-        # Stream file to disk using async IO
-        async with aiofiles.open(temp_path, 'wb') as out_file:
-            while chunk := await file.read(1024 * 1024):  # 1MB chunk size
-                await out_file.write(chunk)
+        if isinstance(file.file, SpooledTemporaryFile) and file.file._rolled:
+            # Fast path: the upload is already a real file on disk, copy + hash it in one thread hop
+            await asyncio.to_thread(_copy_spooled_upload, file.file, temp_path, hasher)
+        else:
+            # Stream file to disk using async IO, hashing each chunk as it passes through
+            async with aiofiles.open(temp_path, 'wb') as out_file:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    await out_file.write(chunk)
+        
+        checksum = hasher.hexdigest()
+        await asyncio.to_thread(write_checksum_sidecar, temp_path, checksum)
         
         logger.info(f"File {file.filename} saved securely. Queuing ingestion.")
         
-        # In a full production flow, engine.start() or a specific single-file 
-        # ingest method is triggered here via BackgroundTasks to not block the HTTP response.
-        # background_tasks.add_task(engine.process_local_file, temp_path)
+        # Ingestion runs after the response is sent, so the HTTP request never waits on chunking/upload
+        background_tasks.add_task(_ingest_uploaded_file, engine, temp_path)
         
         return {
             "status": "success", 
             "filename": file.filename, 
+            "checksum": checksum,
+            "checksum_algo": LOCAL_CHECKSUM_ALGO,
             "message": "File uploaded successfully and queued for Vector Store processing."
         }
     
@@ -84,15 +140,40 @@ async def process_chat_query(
     """
     Main chat interface. Connects the frontend to the backend AI engine.
     The underlying service automatically enforces the RCH correction protocol.
+    Opening questions are answered from the semantic cache when a near-identical one was seen before;
+    follow-up turns always reach the Assistant because they depend on the thread's context.
     """
     try:
         logger.info(f"Received query for thread ID: {request.thread_id}")
         
+        query_vector = None
+        corpus_version = None
+        if settings.SEMANTIC_CACHE_ENABLED and not request.thread_id:
+            semantic_cache = get_semantic_cache()
+            # Syncs run in a separate process, so compare against the DB before trusting any entry
+            corpus_version = await get_sync_engine().db.get_corpus_version()
+            semantic_cache.sync_corpus_version(corpus_version)
+            query_vector = await semantic_cache.embed(request.query)
+            cached = semantic_cache.search(query_vector) if query_vector is not None else None
+
+            if cached:
+                thread_id = await chat_service.seed_cached_turn(request.query, cached.response_text)
+                return ChatResponse(
+                    response_text=cached.response_text,
+                    thread_id=thread_id,
+                    is_rch_triggered=cached.is_rch_triggered
+                )
+
         # Real execution flow: Pass the request to the business logic layer
         response_data = await chat_service.execute_chat_turn(
             query=request.query, 
             thread_id=request.thread_id
         )
+
+        if query_vector is not None:
+            get_semantic_cache().add(
+                query_vector, response_data.response_text, response_data.is_rch_triggered, corpus_version
+            )
         return response_data
         
     except Exception as e:
@@ -55,15 +55,9 @@ if prompt := st.chat_input("Ask a legal question or use RCH..."):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 🛡️ SHIELD 2: The RCH Enforcer Logic (Invisible to user)
-    actual_prompt_to_send = prompt
-    if prompt.strip().upper().startswith("RCH"):
-        strict_command = (
-            "\n\n[SYSTEM ENFORCEMENT]: The user invoked the RCH protocol. "
-            "You MUST output EXACTLY and ONLY the 5-line forensic template or the exact REFUSAL phrase. "
-            "Do NOT write any conversational text, introductions, or summaries."
-        )
-        actual_prompt_to_send = prompt + strict_command
+    # 🛡️ SHIELD 2: The RCH enforcement now lives in the Assistant's system instructions
+    # (assets/system_instructions.txt). Sending the prompt unmodified keeps the prefix identical
+    # across turns, so OpenAI's automatic prompt caching can reuse it.
 
     # Show Assistant Processing
     with st.chat_message("assistant"):
@@ -75,21 +69,22 @@ if prompt := st.chat_input("Ask a legal question or use RCH..."):
             client.beta.threads.messages.create(
                 thread_id=st.session_state.thread_id,
                 role="user",
-                content=actual_prompt_to_send
+                content=prompt
             )
             
-            # Run the Assistant
-            run = client.beta.threads.runs.create_and_poll(
+            # Stream the Assistant run so tokens render as they arrive (first token in well under a second)
+            response = ""
+            with client.beta.threads.runs.stream(
                 thread_id=st.session_state.thread_id,
                 assistant_id=ASSISTANT_ID
-            )
+            ) as stream:
+                for text_delta in stream.text_deltas:
+                    response += text_delta
+                    message_placeholder.markdown(response + "▌")
+                run = stream.get_final_run()
             
             if run.status == 'completed':
-                # Get the latest response
-                messages = client.beta.threads.messages.list(thread_id=st.session_state.thread_id)
-                response = messages.data[0].content[0].text.value
-                
-                # Display and save response
+                # Display and save the final response
                 message_placeholder.markdown(response)
                 st.session_state.messages.append({"role": "assistant", "content": response})
             else:
@@ -1,21 +1,33 @@
+import sqlite3
 from typing import Tuple, Optional
-from tinydb import TinyDB, Query
 from loguru import logger
 from config.settings import settings
 
 class DBManager:
     """
     Manages the local state of synchronized files.
-    Uses TinyDB (JSON-based NoSQL) to track which files have been uploaded.
+    Uses SQLite (WAL mode) to track which files have been uploaded.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS uploaded_files (
+            file_id   TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            checksum  TEXT,
+            status    TEXT NOT NULL DEFAULT 'synced',
+            checksum_algo TEXT NOT NULL DEFAULT 'md5'
+        )
     """
 
     def __init__(self):
         """
         Initializes the database connection.
         """
-        self.db = TinyDB(settings.DB_PATH)
-        self.file_table = self.db.table('uploaded_files')
-        self.FileQuery = Query()
+        self.conn = sqlite3.connect(settings.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(self.SCHEMA)
+        self.conn.commit()
 
     def check_file_status(self, file_id: str) -> Tuple[bool, Optional[str]]:
         """
@@ -27,10 +39,12 @@ class DBManager:
         Returns:
             Tuple[bool, str]: (is_processed, stored_checksum)
         """
-        result = self.file_table.get(self.FileQuery.file_id == file_id)
+        row = self.conn.execute(
+            "SELECT checksum FROM uploaded_files WHERE file_id = ?", (file_id,)
+        ).fetchone()
         
-        if result:
-            return True, result.get('checksum')
+        if row:
+            return True, row[0]
         return False, None
 
     def mark_file_as_processed(self, file_id: str, file_name: str, checksum: str):
@@ -44,15 +58,18 @@ class DBManager:
             checksum (str): MD5 Checksum for version control.
         """
         try:
-            self.file_table.upsert(
-                {
-                    'file_id': file_id, 
-                    'file_name': file_name, 
-                    'checksum': checksum,
-                    'status': 'synced'
-                },
-                self.FileQuery.file_id == file_id
-            )
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT INTO uploaded_files (file_id, file_name, checksum, status)
+                    VALUES (?, ?, ?, 'synced')
+                    ON CONFLICT(file_id) DO UPDATE SET
+                        file_name = excluded.file_name,
+                        checksum  = excluded.checksum,
+                        status    = excluded.status
+                    """,
+                    (file_id, file_name, checksum)
+                )
             logger.debug(f"Database updated for file: {file_name}")
         except Exception as e:
             logger.error(f"Failed to write state to DB for {file_name}: {str(e)}")
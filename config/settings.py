@@ -1,4 +1,5 @@
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -8,19 +9,39 @@ class Settings(BaseSettings):
     """
     Enterprise Configuration Management.
     Validates all environment variables on startup using Pydantic.
+    Filesystem checks live in validate_setup(), which entry points call once at startup
+    (FastAPI lifespan, main.py) instead of on every import of this module.
     """
     
     # OpenAI Configuration
     OPENAI_API_KEY: str
     OPENAI_ASSISTANT_ID: Optional[str] = None
     OPENAI_VECTOR_STORE_ID: Optional[str] = None
+    OPENAI_ID_CACHE_PATH: str = ".scapile_ids.json"  # Resolved Assistant/Vector Store IDs, reused across runs
     
     # Google Drive Configuration
     GOOGLE_CREDENTIALS_FILE: str = "service_account.json"
     GOOGLE_DRIVE_FOLDER_ID: str
 
     # Database Configuration
-    DB_PATH: str = "database/state.json"
+    DB_PATH: str = "database/state.db"
+
+    # Chat Semantic Cache Configuration
+    SEMANTIC_CACHE_ENABLED: bool = False  # Opt-in: adds a DB lookup + embeddings call to every new-thread query
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Minimum cosine similarity to serve a cached answer
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 10000
+    SEMANTIC_CACHE_PATH: str = "database/semantic_cache.npz"
+    EMBEDDING_CACHE_PATH: str = "database/embedding_cache.db"  # Persistent query-embedding cache
+
+    # Ingestion Pipeline Configuration
+    USE_NATIVE_CHUNKER: bool = False  # Requires the optional 'semantic-text-splitter' package
+    IN_MEMORY_PDF_MAX_MB: int = 64  # PDFs up to this size are downloaded and parsed in RAM; larger ones stream to disk
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_DIR: str = ".cache/extract"  # Content-addressed PyMuPDF results (zstd-compressed if available)
+    EXTRACTION_CACHE_MAX_MB: int = 2048  # Least recently used entries are evicted beyond this; 0 = unbounded
+    PROCESSED_CACHE_ENABLED: bool = True
+    PROCESSED_CACHE_DIR: str = ".cache/processed"  # Finished '_processed.txt' outputs of the legacy PDFProcessor
+    PROCESSED_CACHE_MAX_MB: int = 2048  # Least recently used entries are evicted beyond this; 0 = unbounded
 
     # Pydantic Config: Read from .env file
     model_config = SettingsConfigDict(
@@ -29,23 +50,29 @@ class Settings(BaseSettings):
         extra="ignore" # Ignore extra keys in .env
     )
 
+    @cached_property
+    def db_path(self) -> Path:
+        """
+        Resolved SQLite state database path, computed once per Settings instance.
+        """
+        return Path(self.DB_PATH).resolve()
+
     def validate_setup(self):
         """
         Performs a sanity check on critical file paths.
+        Call once at application startup.
         """
         if not os.path.exists(self.GOOGLE_CREDENTIALS_FILE):
             logger.critical(f"Missing Google Credentials File: {self.GOOGLE_CREDENTIALS_FILE}")
             raise FileNotFoundError(f"Please place '{self.GOOGLE_CREDENTIALS_FILE}' in the root directory.")
         
         # Ensure database directory exists
-        db_path_obj = Path(self.DB_PATH)
-        db_path_obj.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
 # Instantiate global settings object
 try:
     settings = Settings()
-    settings.validate_setup()
-    logger.success("Configuration loaded and validated successfully.")
+    logger.success("Configuration loaded successfully.")
 except Exception as e:
     logger.critical(f"Configuration Error: {str(e)}")
     raise ValueError("System cannot start due to missing configuration.") from e
\ No newline at end of file
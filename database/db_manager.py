@@ -1,24 +1,68 @@
+import json
+import sqlite3
 import asyncio
-from typing import Tuple, Optional
-from tinydb import TinyDB, Query
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional
 from loguru import logger
 from config.settings import settings
 
 class DBManager:
     """
     Manages the local state of synchronized files.
-    Uses TinyDB (JSON-based NoSQL) to track which files have been uploaded.
+    Uses SQLite (WAL mode) to track which files have been uploaded: lookups hit the primary-key
+    B-tree and each upsert appends a page to the WAL instead of rewriting the whole state file.
     Now upgraded with asyncio locks to prevent DB corruption during massive parallel ingestion.
+    A bounded in-memory LRU cache fronts status lookups so repeated checks skip the thread hop.
+    The CLI sync and the API are separate processes on the same file, so the LRU is dropped
+    whenever SQLite reports a commit from another connection (PRAGMA data_version).
+    """
+
+    # Upper bound on cached file statuses (~100 bytes each, so roughly 10MB at capacity)
+    CACHE_MAX_ENTRIES = 100_000
+
+    # Stay below SQLite's default host-parameter limit (999 on older builds) for IN (...) queries
+    BATCH_QUERY_SIZE = 900
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS uploaded_files (
+            file_id   TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            checksum  TEXT,
+            status    TEXT NOT NULL DEFAULT 'synced',
+            -- 'md5' for Drive-synced files (Drive reports MD5), 'blake3' or 'blake2b' for locally hashed uploads
+            checksum_algo TEXT NOT NULL DEFAULT 'md5',
+            -- Julian day of the last upsert; MAX(synced_at) fingerprints the ingested corpus
+            synced_at REAL
+        )
+    """
+
+    UPSERT_SQL = """
+        INSERT INTO uploaded_files (file_id, file_name, checksum, status, checksum_algo, synced_at)
+        VALUES (?, ?, ?, 'synced', ?, julianday('now'))
+        ON CONFLICT(file_id) DO UPDATE SET
+            file_name     = excluded.file_name,
+            checksum      = excluded.checksum,
+            status        = excluded.status,
+            checksum_algo = excluded.checksum_algo,
+            synced_at     = excluded.synced_at
     """
 
     def __init__(self):
         """
         Initializes the database connection.
+        The connection is shared with worker threads; the asyncio lock serializes access to it.
         """
-        self.db = TinyDB(settings.DB_PATH)
-        self.file_table = self.db.table('uploaded_files')
-        self.FileQuery = Query()
+        self.conn = sqlite3.connect(settings.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute(self.SCHEMA)
+        self._migrate_schema()
+        self.conn.commit()
+        self._import_legacy_state()
         self._lock: Optional[asyncio.Lock] = None
+        self._cache: "OrderedDict[str, Tuple[bool, Optional[str]]]" = OrderedDict()
+        self._data_version = self._read_data_version()
 
     @property
     def lock(self) -> asyncio.Lock:
@@ -30,10 +74,130 @@ class DBManager:
             self._lock = asyncio.Lock()
         return self._lock
 
+    def _migrate_schema(self):
+        """
+        Adds columns introduced after the initial SQLite schema to existing databases.
+        Existing rows all came from Drive, so they default to 'md5'; their synced_at stays NULL.
+        """
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(uploaded_files)")}
+        if "checksum_algo" not in columns:
+            self.conn.execute("ALTER TABLE uploaded_files ADD COLUMN checksum_algo TEXT NOT NULL DEFAULT 'md5'")
+            logger.info("Migrated uploaded_files table: added checksum_algo column.")
+        if "synced_at" not in columns:
+            self.conn.execute("ALTER TABLE uploaded_files ADD COLUMN synced_at REAL")
+            logger.info("Migrated uploaded_files table: added synced_at column.")
+
+    def _import_legacy_state(self):
+        """
+        One-time migration of the previous TinyDB JSON state (e.g. database/state.json).
+        Without it, every already-synced file would look new and be re-uploaded to the Vector Store.
+        """
+        legacy_path = settings.db_path.with_suffix(".json")
+        if not legacy_path.exists() or legacy_path.stat().st_size == 0:
+            return
+        if self.conn.execute("SELECT 1 FROM uploaded_files LIMIT 1").fetchone():
+            return
+
+        try:
+            records = json.loads(legacy_path.read_text(encoding="utf-8")).get("uploaded_files", {})
+            rows = [(r['file_id'], r['file_name'], r.get('checksum'), 'md5') for r in records.values()]
+            with self.conn:
+                self.conn.executemany(self.UPSERT_SQL, rows)
+            logger.info(f"Imported {len(rows)} records from legacy state file: {legacy_path}")
+        except Exception as e:
+            logger.error(f"Failed to import legacy state from {legacy_path}: {str(e)}")
+
+    def _read_data_version(self) -> int:
+        """
+        SQLite's per-connection change counter: it moves only when another connection commits.
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _invalidate_cache_on_external_write(self):
+        """
+        Drops the LRU if another process (e.g. a CLI sync) committed since the last check.
+        This connection's own writes keep the LRU current themselves and do not trigger it.
+        Reads an in-memory pager counter (no table access), so it is cheap enough for every lookup.
+        """
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            if self._cache:
+                logger.debug("State DB changed by another process, dropping status cache.")
+                self._cache.clear()
+            self._data_version = data_version
+
+    def _cache_put(self, file_id: str, status: Tuple[bool, Optional[str]]):
+        """
+        Stores a status in the LRU cache, evicting the least recently used entry when full.
+        Only touched from the event loop thread, so no extra locking is required.
+        """
+        self._cache[file_id] = status
+        self._cache.move_to_end(file_id)
+        if len(self._cache) > self.CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    def _fetch_checksum(self, file_id: str) -> Optional[Tuple[str]]:
+        """
+        Synchronous primary-key lookup. Runs in a worker thread.
+        """
+        return self.conn.execute(
+            "SELECT checksum FROM uploaded_files WHERE file_id = ?", (file_id,)
+        ).fetchone()
+
+    def _fetch_checksums_batch(self, file_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Synchronous bulk lookup using IN (...) queries of BATCH_QUERY_SIZE ids. Runs in a worker thread.
+        """
+        found: Dict[str, Optional[str]] = {}
+        for start in range(0, len(file_ids), self.BATCH_QUERY_SIZE):
+            batch = file_ids[start:start + self.BATCH_QUERY_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT file_id, checksum FROM uploaded_files WHERE file_id IN ({placeholders})", batch
+            )
+            found.update(rows)
+        return found
+
+    def _upsert_file(self, file_id: str, file_name: str, checksum: str, checksum_algo: str):
+        """
+        Synchronous upsert + commit. Runs in a worker thread.
+        """
+        with self.conn:
+            self.conn.execute(self.UPSERT_SQL, (file_id, file_name, checksum, checksum_algo))
+
+    def _upsert_files_bulk(self, rows: List[Tuple[str, str, str, str]]):
+        """
+        Synchronous multi-row upsert in one transaction (a single commit/WAL sync). Runs in a worker thread.
+        """
+        with self.conn:
+            self.conn.executemany(self.UPSERT_SQL, rows)
+
+    def _fetch_corpus_version(self) -> str:
+        """
+        Synchronous row count + last-upsert lookup. Runs in a worker thread.
+        """
+        count, last_synced_at = self.conn.execute(
+            "SELECT COUNT(*), MAX(synced_at) FROM uploaded_files"
+        ).fetchone()
+        return f"{count}:{last_synced_at}"
+
+    async def get_corpus_version(self) -> str:
+        """
+        Fingerprints the ingested corpus so derived caches (e.g. the semantic answer cache)
+        can tell when the Vector Store content has changed underneath them.
+        Reads straight from SQLite, so syncs committed by another process (the CLI) are seen too.
+
+        Returns:
+            str: "<row count>:<last synced_at>"; changes whenever a file is added or re-ingested.
+        """
+        async with self.lock:
+            return await asyncio.to_thread(self._fetch_corpus_version)
+
     async def check_file_status(self, file_id: str) -> Tuple[bool, Optional[str]]:
         """
         Checks if a file exists in the database and returns its checksum.
-        Wrapped in async lock to guarantee thread safety during parallel reads.
+        Served from the LRU cache when possible; misses are wrapped in the async lock
+        to guarantee thread safety during parallel reads.
         
         Args:
             file_id (str): The unique Google Drive File ID.
@@ -41,39 +205,100 @@ class DBManager:
         Returns:
             Tuple[bool, str]: (is_processed, stored_checksum)
         """
+        self._invalidate_cache_on_external_write()
+        cached = self._cache.get(file_id)
+        if cached is not None:
+            self._cache.move_to_end(file_id)
+            return cached
+
         async with self.lock:
             # Offload blocking IO to a thread so the async event loop remains unblocked
-            result = await asyncio.to_thread(self.file_table.get, self.FileQuery.file_id == file_id)
+            row = await asyncio.to_thread(self._fetch_checksum, file_id)
             
-            if result:
-                return True, result.get('checksum')
-            return False, None
+            status = (True, row[0]) if row else (False, None)
+            self._cache_put(file_id, status)
+            return status
 
-    async def mark_file_as_processed(self, file_id: str, file_name: str, checksum: str):
+    async def check_files_batch(self, file_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Bulk variant of check_file_status for a whole Drive listing.
+        Ids already in the LRU cache are answered from memory; the rest are resolved
+        in a single thread hop instead of one round-trip per file.
+
+        Args:
+            file_ids (List[str]): Google Drive File IDs to look up.
+
+        Returns:
+            Dict[str, str]: stored_checksum keyed by file_id. Unprocessed files are absent.
+        """
+        self._invalidate_cache_on_external_write()
+        found: Dict[str, Optional[str]] = {}
+        misses: List[str] = []
+
+        for file_id in file_ids:
+            cached = self._cache.get(file_id)
+            if cached is None:
+                misses.append(file_id)
+                continue
+            self._cache.move_to_end(file_id)
+            if cached[0]:
+                found[file_id] = cached[1]
+
+        if not misses:
+            return found
+
+        async with self.lock:
+            fetched = await asyncio.to_thread(self._fetch_checksums_batch, misses)
+
+        for file_id in misses:
+            self._cache_put(file_id, (True, fetched[file_id]) if file_id in fetched else (False, None))
+        found.update(fetched)
+        return found
+
+    async def mark_file_as_processed(self, file_id: str, file_name: str, checksum: str, checksum_algo: str = "md5"):
         """
         Upserts (Update or Insert) a file record into the database.
         Call this ONLY after a successful upload to OpenAI.
-        Guarded by asyncio.Lock to prevent state.json corruption under heavy concurrency.
+        Guarded by asyncio.Lock to serialize writers on the shared SQLite connection.
 
         Args:
             file_id (str): Google Drive File ID.
             file_name (str): File name for readability.
-            checksum (str): MD5 Checksum for version control.
+            checksum (str): Checksum for version control (Drive MD5, or BLAKE3 for local uploads).
+            checksum_algo (str): Algorithm that produced checksum. Defaults to 'md5' (Drive).
         """
         try:
             async with self.lock:
                 # Offload the blocking disk write to thread
-                await asyncio.to_thread(
-                    self.file_table.upsert,
-                    {
-                        'file_id': file_id, 
-                        'file_name': file_name, 
-                        'checksum': checksum,
-                        'status': 'synced'
-                    },
-                    self.FileQuery.file_id == file_id
-                )
+                await asyncio.to_thread(self._upsert_file, file_id, file_name, checksum, checksum_algo)
+                self._cache_put(file_id, (True, checksum))
             logger.debug(f"Database successfully updated for file: {file_name}")
         except Exception as e:
             logger.error(f"Failed to write state to DB for {file_name}: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+    async def mark_files_as_processed_bulk(self, rows: List[Tuple[str, str, str]], checksum_algo: str = "md5"):
+        """
+        Bulk variant of mark_file_as_processed: upserts many records with one executemany and one commit,
+        so a large ingestion pays one WAL sync per batch instead of one per file.
+        Call this ONLY with files that were successfully uploaded to OpenAI.
+
+        Args:
+            rows (List[Tuple[str, str, str]]): (file_id, file_name, checksum) per uploaded file.
+            checksum_algo (str): Algorithm that produced every checksum. Defaults to 'md5' (Drive).
+        """
+        if not rows:
+            return
+
+        try:
+            async with self.lock:
+                await asyncio.to_thread(
+                    self._upsert_files_bulk,
+                    [(file_id, file_name, checksum, checksum_algo) for file_id, file_name, checksum in rows]
+                )
+                for file_id, _, checksum in rows:
+                    self._cache_put(file_id, (True, checksum))
+            logger.debug(f"Database successfully updated for {len(rows)} files.")
+        except Exception as e:
+            logger.error(f"Failed to write state to DB for {len(rows)} files: {str(e)}")
+            raise e
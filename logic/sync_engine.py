@@ -2,8 +2,11 @@ import os
 import re
 import shutil
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable, Awaitable
 
 # Third-party libraries
 from loguru import logger
@@ -16,8 +19,24 @@ from config.settings import settings
 
 # Phase 2.5: Advanced Data Processing Modules
 from services.extraction_service import ExtractionService
-from logic.semantic_chunker import SemanticChunker
+from logic.semantic_chunker import SemanticChunker, chunk_pages
 from utils.metadata_injector import MetadataInjector
+from utils.file_utils import calculate_file_md5, calculate_file_fingerprint, checksum_sidecar_path, read_checksum_sidecar
+
+# Filename metadata pattern, compiled once at import time ("YYYY - Author - Title"):
+# ^(?:(\d{4})\s*-\s*)? -> Optionally match exactly 4 digits at start (Year) followed by hyphen
+# (?:(.*?)\s*-\s*)?    -> Optionally match anything up to the next hyphen (Author)
+# (.*)$                -> Match everything else till the end (Title)
+FILENAME_METADATA = re.compile(r"^(?:(\d{4})\s*-\s*)?(?:(.*?)\s*-\s*)?(.*)$")
+
+@lru_cache(maxsize=1)
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide pool for CPU-bound chunking, shared by every SyncEngine instance.
+    Uses the 'spawn' start method so workers never inherit locks held by the event loop's threads.
+    Worker processes are started lazily on first use.
+    """
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
 
 class SyncEngine:
     """
@@ -30,6 +49,14 @@ class SyncEngine:
     """
 
     TEMP_DIR = Path("temp_data")
+    # API uploads live outside TEMP_DIR, which is wiped at every engine start/finish
+    UPLOAD_DIR = Path("temp_uploads")
+
+    # Pages sent to a chunking worker per task (the pool.map 'chunksize')
+    CHUNK_PAGES_PER_TASK = 16
+
+    # Successful uploads are recorded in the DB in groups of this many rows (one commit per group)
+    DB_COMMIT_BATCH_SIZE = 100
 
     def __init__(self):
         """
@@ -43,20 +70,37 @@ class SyncEngine:
         self.db = DBManager()
 
         # Initialize Phase 2.5 Intelligence Pipeline
-        self.extractor = ExtractionService()
-        self.chunker = SemanticChunker()
+        # Large PDFs are sharded across the same process pool used for chunking
+        self.extractor = ExtractionService(executor=get_cpu_pool())
+        self.chunker = SemanticChunker(use_native=settings.USE_NATIVE_CHUNKER)
         self.injector = MetadataInjector()
 
-        # Ensure temp directory exists and is clean
-        self._prepare_temp_dir()
+        # Ensure temp directory exists and is clean (no event loop yet, so clean inline)
+        self._clean_temp_dir()
 
-    def _prepare_temp_dir(self):
+    def _clean_temp_dir(self):
         """
         Ensures the temporary download directory exists and is empty.
+        Unlinks files straight from a single os.scandir pass (no per-file stat walk like rmtree)
+        and only falls back to shutil.rmtree for nested directories. Blocking; see _prepare_temp_dir.
         """
-        if self.TEMP_DIR.exists():
-            shutil.rmtree(self.TEMP_DIR)
         self.TEMP_DIR.mkdir(parents=True, exist_ok=True)
+        with os.scandir(self.TEMP_DIR) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+                except OSError as e:
+                    logger.warning(f"Could not remove temp entry {entry.path}: {str(e)}")
+
+    async def _prepare_temp_dir(self):
+        """
+        Async cleanup of the temporary download directory.
+        Runs in a worker thread so a mid-flight failure leaving thousands of PDFs behind never stalls the event loop.
+        """
+        await asyncio.to_thread(self._clean_temp_dir)
 
     async def start(self):
         """
@@ -94,8 +138,9 @@ class SyncEngine:
             logger.critical(f"Synchronization failed due to critical error: {str(e)}")
             raise e
         finally:
-            # Final cleanup of temp resources
-            self._prepare_temp_dir()
+            # Final cleanup of temp resources and pooled Drive connections
+            await self.drive.close()
+            await self._prepare_temp_dir()
 
     async def _get_files_to_process(self, drive_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -109,19 +154,19 @@ class SyncEngine:
             List[Dict]: Subset of files needing upload.
         """
         processing_queue = []
+
+        # Resolve the stored state for the whole listing in one bulk DB call
+        stored_checksums = await self.db.check_files_batch([file['id'] for file in drive_files])
         
         for file in drive_files:
             file_id = file['id']
             file_name = file['name']
             remote_checksum = file['md5Checksum']
 
-            # Check DB state - Now natively async
-            is_processed, stored_checksum = await self.db.check_file_status(file_id)
-
-            if not is_processed:
+            if file_id not in stored_checksums:
                 logger.info(f"New file detected: {file_name}")
                 processing_queue.append(file)
-            elif stored_checksum != remote_checksum:
+            elif stored_checksums[file_id] != remote_checksum:
                 logger.warning(f"File modified (checksum mismatch): {file_name}. Re-syncing.")
                 processing_queue.append(file)
             else:
@@ -136,14 +181,9 @@ class SyncEngine:
         Format expected: "YYYY - Author - Title.pdf"
         Uses Regex to prevent corrupting metadata on non-standard filenames.
         """
-        clean_name = filename.replace(".pdf", "").strip()
-        
-        # Regex explanation:
-        # ^(?:(\d{4})\s*-\s*)? -> Optionally match exactly 4 digits at start (Year) followed by hyphen
-        # (?:(.*?)\s*-\s*)?    -> Optionally match anything up to the next hyphen (Author)
-        # (.*)$                -> Match everything else till the end (Title)
-        pattern = r"^(?:(\d{4})\s*-\s*)?(?:(.*?)\s*-\s*)?(.*)$"
-        match = re.match(pattern, clean_name)
+        # Strip only the trailing extension (case-insensitive), not every ".pdf" in the name
+        clean_name = (filename[:-4] if filename.lower().endswith(".pdf") else filename).strip()
+        match = FILENAME_METADATA.match(clean_name)
         
         year = "Unknown"
         author = "Unknown"
@@ -166,131 +206,432 @@ class SyncEngine:
                 # Fallback if format is just "Author - Title" without year
                 title = extracted_author.strip()
                 author = "Unknown"
-                
-        logger.debug(f"Parsed Metadata -> Year: {year} | Author: {author} | Title: {title}")
+
         return year, author, title
 
-    def _write_text_file(self, file_path: str, content: str):
+    async def _chunk_pages(self, extracted_pages: List[Dict[str, Any]]) -> List[List[str]]:
+        """
+        Semantically chunks every page of a document inside the shared process pool.
+        Keeps the GIL-bound regex/string work off the event loop. Pages are independent, so large
+        documents are split into CHUNK_PAGES_PER_TASK slices that chunk on separate cores;
+        slicing amortizes the pickling round-trip over many pages instead of paying it per page.
+        Pages that already fit in a single chunk need no boundary scan, so they are resolved
+        inline and only the pages with real CPU work are shipped to the workers.
         """
-        Synchronous helper to write processed text to disk safely.
+        loop = asyncio.get_running_loop()
+        pool = get_cpu_pool()
+        max_chars = self.chunker.max_chunk_chars
+        step = self.CHUNK_PAGES_PER_TASK
+
+        chunks_per_page: List[Optional[List[str]]] = []
+        long_page_indexes: List[int] = []
+        for index, page in enumerate(extracted_pages):
+            if len(page["text"]) <= max_chars:
+                chunks_per_page.append(self.chunker.chunk_text(page["text"]))
+            else:
+                chunks_per_page.append(None)
+                long_page_indexes.append(index)
+
+        if not long_page_indexes:
+            return chunks_per_page
+
+        long_page_texts = [extracted_pages[index]["text"] for index in long_page_indexes]
+        slices = await asyncio.gather(*[
+            loop.run_in_executor(
+                pool,
+                chunk_pages,
+                long_page_texts[start:start + step],
+                max_chars,
+                settings.USE_NATIVE_CHUNKER
+            )
+            for start in range(0, len(long_page_texts), step)
+        ])
+
+        long_page_chunks = (chunks for page_slice in slices for chunks in page_slice)
+        for index, chunks in zip(long_page_indexes, long_page_chunks):
+            chunks_per_page[index] = chunks
+        return chunks_per_page
+
+    async def _build_processed_bytes(
+        self, local_path: str, file_name: str, fingerprint: Optional[Tuple[str, str]] = None
+    ) -> bytes:
         """
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        Runs the Phase 2.5 Advanced Extraction & Chunking Pipeline on a local PDF.
+        The metadata-enriched chunks stay in memory: they are handed to the Vector Store
+        upload as UTF-8 bytes, with no '_processed.txt' round-trip through the disk.
+
+        Args:
+            local_path (str): Local path of the PDF.
+            file_name (str): Original file name (drives the injected metadata).
+            fingerprint (Optional[Tuple[str, str]]): Known (algo, checksum), passed to the extraction
+                cache so the PDF is not read a second time just to hash it.
 
-    async def _process_single_file(self, file: Dict[str, Any], vector_store_id: str, semaphore: asyncio.Semaphore) -> bool:
+        Returns:
+            bytes: UTF-8 encoded processed text, ready for Vector Store upload.
         """
-        Worker function to process a single file asynchronously.
-        Ensures strict concurrency control via semaphore.
-        Executes the Phase 2.5 Advanced Extraction & Chunking Pipeline.
+        logger.info(f"Extracting & Chunking: {file_name}")
+        
+        # 1. Geometrically extract pages
+        extracted_pages = await self.extractor.extract_document(local_path, fingerprint)
+        
+        # 2. Chunk and inject straight into bytes; the payload is passed through to the upload
+        return await self._build_processed_payload(extracted_pages, file_name)
+
+    async def _build_processed_payload(self, extracted_pages: List[Dict[str, Any]], file_name: str) -> bytes:
         """
-        file_id = file['id']
-        file_name = file['name']
-        checksum = file['md5Checksum']
-        local_path = None
-        processed_path = None
+        Chunks extracted pages and injects the filename metadata into every chunk.
+        Chunks are emitted as UTF-8 bytes around a metadata block encoded once per document,
+        so the final document is a single bytes join with no whole-document str.encode() copy.
 
-        async with semaphore:
-            try:
-                # Step A: Download from Drive (Now natively async, removed to_thread wrapper)
-                logger.info(f"Downloading file: {file_name}")
-                local_path = await self.drive.download_file(
-                    file_id=file_id, 
-                    file_name=file_name, 
-                    destination_dir=str(self.TEMP_DIR)
-                )
+        Returns:
+            bytes: The metadata-enriched document, UTF-8 encoded and ready for Vector Store upload.
+        """
+        # Lazy: the message is only formatted when DEBUG logging is actually enabled
+        logger.opt(lazy=True).debug("Extracted {} pages from {}", lambda: len(extracted_pages), lambda: file_name)
+        year, author, title = self._parse_filename_metadata(file_name)
+        
+        # Semantically chunk all pages (process pool), then inject metadata
+        chunks_per_page = await self._chunk_pages(extracted_pages)
 
-                if not local_path:
-                    raise ValueError("Download returned no path.")
-
-                # Step B: Phase 2.5 - Semantic Chunking & Metadata Injection Pipeline
-                logger.info(f"Extracting & Chunking: {file_name}")
-                year, author, title = self._parse_filename_metadata(file_name)
-                
-                # 1. Geometrically extract pages
-                extracted_pages = await self.extractor.extract_document(local_path)
-                logger.debug(f"Extracted {len(extracted_pages)} pages from {file_name}")
-                
-                final_text_blocks = []
-                total_chunks = 0
-                # 2. Semantically chunk each page and inject metadata
-                for page in extracted_pages:
-                    chunks = self.chunker.chunk_text(page["text"])
-                    total_chunks += len(chunks)
-                    for chunk in chunks:
-                        meta = {
-                            "title": title,
-                            "author": author,
-                            "year": year,
-                            "internal_page_number": page["internal_page_number"]
-                        }
-                        enriched_chunk = self.injector.inject_metadata(chunk, meta)
-                        final_text_blocks.append(enriched_chunk)
-
-                final_document_text = "\n\n".join(final_text_blocks)
-                logger.info(f"File {file_name} successfully processed into {total_chunks} chunks.")
-                
-                # 3. Save the highly structured output as a .txt file
-                processed_path = f"{local_path}_processed.txt"
-                await asyncio.to_thread(self._write_text_file, processed_path, final_document_text)
-
-                # Step C: Upload the PROCESSED text file to OpenAI Vector Store
-                logger.info(f"Uploading structured chunks to OpenAI Vector Store for: {file_name}")
-                upload_status = await asyncio.to_thread(
-                    self.openai.upload_file_to_store,
-                    file_path=processed_path, 
-                    vector_store_id=vector_store_id
-                )
+        # Title/author/year are validated once per document; per chunk only the page number varies
+        format_chunk = self.injector.make_page_formatter_bytes(title, author, year)
+
+        final_text_blocks = []
+        total_chunks = 0
+        for page, chunks in zip(extracted_pages, chunks_per_page):
+            total_chunks += len(chunks)
+            internal_page_number = page["internal_page_number"]
+            final_text_blocks.extend(format_chunk(chunk, internal_page_number) for chunk in chunks)
+
+        final_document_bytes = b"\n\n".join(final_text_blocks)
+        logger.info(f"File {file_name} successfully processed into {total_chunks} chunks.")
+        return final_document_bytes
 
-                # Step D: Update State in Database (Now natively async, removed to_thread wrapper)
-                if upload_status:
+    async def process_local_file(self, file_path: str) -> bool:
+        """
+        Ingests a single PDF that was uploaded through the API.
+        Designed to run as a FastAPI background task, so the HTTP response never waits on ingestion.
+        Reuses the checksum sidecar written during upload streaming instead of re-hashing the file
+        (falling back to calculate_file_fingerprint when no sidecar exists).
+
+        Args:
+            file_path (str): Local path of the uploaded PDF.
+
+        Returns:
+            bool: True if the file was ingested (or was already up-to-date).
+        """
+        file_name = os.path.basename(file_path)
+        file_id = f"upload:{file_name}"
+
+        try:
+            sidecar = await asyncio.to_thread(read_checksum_sidecar, file_path)
+            if not sidecar:
+                sidecar = await asyncio.to_thread(calculate_file_fingerprint, file_path)
+            if not sidecar:
+                raise ValueError("Could not fingerprint uploaded file.")
+            checksum_algo, checksum = sidecar
+
+            is_processed, stored_checksum = await self.db.check_file_status(file_id)
+            if is_processed and stored_checksum == checksum:
+                logger.info(f"Uploaded file already ingested with identical content: {file_name}")
+                return True
+
+            # One-time migration: records written before fingerprints replaced MD5 still hold an MD5.
+            # Re-hash with MD5 once; on a match, just re-tag the record instead of re-uploading.
+            if is_processed and checksum_algo != "md5":
+                legacy_checksum = await asyncio.to_thread(calculate_file_md5, file_path)
+                if legacy_checksum == stored_checksum:
                     await self.db.mark_file_as_processed(
-                        file_id=file_id, 
-                        file_name=file_name, 
-                        checksum=checksum
+                        file_id=file_id,
+                        file_name=file_name,
+                        checksum=checksum,
+                        checksum_algo=checksum_algo
                     )
-                    logger.success(f"Successfully processed and recorded: {file_name}")
+                    logger.info(f"Migrated stored MD5 to {checksum_algo} fingerprint for: {file_name}")
                     return True
-                
+
+            vector_store_id = await asyncio.to_thread(self.openai.ensure_vector_store)
+            processed_bytes = await self._build_processed_bytes(file_path, file_name, (checksum_algo, checksum))
+
+            logger.info(f"Uploading structured chunks to OpenAI Vector Store for: {file_name}")
+            upload_status = await asyncio.to_thread(
+                self.openai.upload_file_to_store,
+                file_tuple=(f"{file_name}_processed.txt", processed_bytes), 
+                vector_store_id=vector_store_id
+            )
+
+            if upload_status:
+                await self.db.mark_file_as_processed(
+                    file_id=file_id, 
+                    file_name=file_name, 
+                    checksum=checksum,
+                    checksum_algo=checksum_algo
+                )
+                logger.success(f"Successfully ingested uploaded file: {file_name}")
+                return True
+            return False
+
+        except Exception as e:
+            logger.error(f"Failed to ingest uploaded file {file_name}: {str(e)}")
+            return False
+
+        finally:
+            # Uploads are one-shot: drop the PDF and its checksum sidecar
+            for path_to_clean in [file_path, checksum_sidecar_path(file_path)]:
+                try:
+                    os.remove(path_to_clean)
+                except OSError:
+                    pass
+
+    async def _download_stage(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pipeline stage 1 (network-bound): fetches a file from Google Drive.
+        Small and medium PDFs are kept in memory; large (or unsized) ones stream to disk.
+        """
+        file = job['file']
+        file_id = file['id']
+        file_name = file['name']
+
+        if 0 < file.get('size', 0) <= settings.IN_MEMORY_PDF_MAX_MB * 1024 * 1024:
+            # Step A (in-memory): the PDF never touches the disk
+            logger.info(f"Downloading file into memory: {file_name}")
+            job['pdf_bytes'] = await self.drive.download_file_bytes(file_id=file_id, file_name=file_name)
+        else:
+            # Step A: Download from Drive (Now natively async, removed to_thread wrapper)
+            # Large (or unsized) PDFs stream to disk to cap RAM during 13GB ingestions
+            logger.info(f"Downloading file: {file_name}")
+            job['local_path'] = await self.drive.download_file(
+                file_id=file_id, 
+                file_name=file_name, 
+                destination_dir=str(self.TEMP_DIR)
+            )
+
+            if not job['local_path']:
+                raise ValueError("Download returned no path.")
+        return job
+
+    async def _processing_stage(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pipeline stage 2 (CPU-bound): Phase 2.5 extraction, semantic chunking and metadata injection.
+        Extraction runs in a worker thread and chunking in the shared process pool.
+        """
+        file_name = job['file']['name']
+        # Drive already reports the content MD5; reuse it as the extraction cache fingerprint
+        drive_md5 = job['file'].get('md5Checksum')
+        fingerprint = ("md5", drive_md5) if drive_md5 else None
+
+        if 'pdf_bytes' in job:
+            # Step B (in-memory): extract, chunk and encode without touching the disk
+            extracted_pages = await self.extractor.extract_document_bytes(job.pop('pdf_bytes'), file_name, fingerprint)
+            job['processed_bytes'] = await self._build_processed_payload(extracted_pages, file_name)
+        else:
+            # Step B: Phase 2.5 - Semantic Chunking & Metadata Injection Pipeline
+            job['processed_bytes'] = await self._build_processed_bytes(job['local_path'], file_name, fingerprint)
+        return job
+
+    async def _upload_stage(
+        self,
+        jobs: List[Dict[str, Any]],
+        vector_store_id: str,
+        upload_pool: ThreadPoolExecutor,
+        pending_records: List[Tuple[str, str, str]]
+    ) -> List[bool]:
+        """
+        Pipeline stage 3 (network-bound): uploads the processed text of a group of files to the
+        Vector Store as a single file batch (OpenAI embeds it server-side) and queues the
+        successful files for the database.
+        Blocking upload/poll calls run on a dedicated thread pool, so they never starve
+        extraction threads in the default executor.
+        Records are committed DB_COMMIT_BATCH_SIZE at a time; _process_file_batch flushes the rest.
+        """
+        loop = asyncio.get_running_loop()
+        file_tuples = [(f"{job['file']['name']}_processed.txt", job.pop('processed_bytes')) for job in jobs]
+
+        # Step C: Upload the PROCESSED text to OpenAI Vector Store (one batch, one polling loop)
+        logger.info(f"Uploading structured chunks to OpenAI Vector Store for {len(jobs)} files.")
+        upload_results = await loop.run_in_executor(
+            upload_pool,
+            self.openai.upload_files_to_store,
+            file_tuples,
+            vector_store_id
+        )
+
+        # Step D: Queue the state updates; full groups are committed in one transaction
+        for job, uploaded in zip(jobs, upload_results):
+            file = job['file']
+            if uploaded:
+                pending_records.append((file['id'], file['name'], file['md5Checksum']))
+                logger.success(f"Successfully processed: {file['name']}")
+            else:
+                logger.error(f"Vector Store indexing failed for: {file['name']}")
+
+        if len(pending_records) >= self.DB_COMMIT_BATCH_SIZE:
+            await self._flush_processed_records(pending_records)
+        return upload_results
+
+    async def _flush_processed_records(self, pending_records: List[Tuple[str, str, str]]):
+        """
+        Commits every queued (file_id, file_name, checksum) record with a single bulk upsert.
+        The list is swapped out before awaiting, so uploads finishing meanwhile start a new group.
+        """
+        if not pending_records:
+            return
+
+        rows = pending_records[:]
+        del pending_records[:]
+        await self.db.mark_files_as_processed_bulk(rows)
+        logger.info(f"Recorded {len(rows)} processed files in the database.")
+
+    async def _stage_worker(
+        self,
+        stage: Callable[[Dict[str, Any]], Awaitable[Any]],
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        counts: Dict[str, int]
+    ):
+        """
+        Generic pipeline worker: drains jobs from inbox until it receives the None sentinel,
+        passing each result to outbox (or tallying it, for the final stage).
+        A failing file is logged and dropped; the worker moves on to the next job.
+        """
+        while (job := await inbox.get()) is not None:
+            try:
+                result = await stage(job)
             except Exception as e:
-                logger.error(f"Failed to process {file_name}: {str(e)}")
-                return False
-            
-            finally:
-                # Step E: Immediate Cleanup of both original PDF and processed text
-                pass
-                # for path_to_clean in [local_path, processed_path]:
-                #     if path_to_clean and os.path.exists(path_to_clean):
-                #         try:
-                #             os.remove(path_to_clean)
-                #         except OSError:
-                #             pass
-        return False
+                logger.error(f"Failed to process {job['file']['name']}: {str(e)}")
+                counts["failed"] += 1
+                continue
+
+            if outbox is not None:
+                await outbox.put(result)
+            else:
+                counts["succeeded" if result is True else "failed"] += 1
+
+    async def _batch_stage_worker(
+        self,
+        stage: Callable[[List[Dict[str, Any]]], Awaitable[List[bool]]],
+        inbox: asyncio.Queue,
+        counts: Dict[str, int],
+        batch_size: int
+    ):
+        """
+        Final-stage variant of _stage_worker: groups the job just received with those already
+        waiting in inbox (up to batch_size) and hands the group to stage, which returns one
+        bool per job. It never waits for a group to fill, so a lightly loaded pipeline still
+        ships each file immediately, while a backlog collapses into fewer, larger batches.
+        """
+        finished = False
+        while not finished and (job := await inbox.get()) is not None:
+            jobs = [job]
+            while len(jobs) < batch_size:
+                try:
+                    next_job = inbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if next_job is None:
+                    # This worker's end-of-stream sentinel: ship what was gathered, then stop
+                    finished = True
+                    break
+                jobs.append(next_job)
+
+            try:
+                results = await stage(jobs)
+            except Exception as e:
+                for failed_job in jobs:
+                    logger.error(f"Failed to process {failed_job['file']['name']}: {str(e)}")
+                counts["failed"] += len(jobs)
+                continue
+
+            for result in results:
+                counts["succeeded" if result is True else "failed"] += 1
+
+    async def _run_stage(
+        self,
+        stage: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: int,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        next_stage_workers: int,
+        counts: Dict[str, int],
+        batch_size: int = 1
+    ):
+        """
+        Runs a pool of workers for one stage, then signals end-of-stream to every worker of the next stage.
+        A batch_size above 1 (final stage only) makes each worker hand grouped jobs to the stage.
+        """
+        await asyncio.gather(*[
+            self._batch_stage_worker(stage, inbox, counts, batch_size) if batch_size > 1
+            else self._stage_worker(stage, inbox, outbox, counts)
+            for _ in range(workers)
+        ])
+        if outbox is not None:
+            for _ in range(next_stage_workers):
+                await outbox.put(None)
 
     async def _process_file_batch(self, files: List[Dict[str, Any]], vector_store_id: str):
         """
         Iterates through the processing queue concurrently.
-        Manages downloads -> uploads -> DB updates with strict concurrency limits.
+        Runs downloads -> extraction/chunking -> uploads + DB updates as three independent
+        worker pools joined by bounded queues: Drive bandwidth, CPU chunking and OpenAI
+        bandwidth overlap across different files instead of sharing one per-file slot.
         
         Args:
             files: List of files to process.
             vector_store_id: ID of the target OpenAI Vector Store.
         """
-        # Concurrency limit to prevent RAM exhaustion and rate limits on massive datasets
-        max_concurrent_tasks = 10
-        semaphore = asyncio.Semaphore(max_concurrent_tasks)
+        # Concurrency limits to prevent RAM exhaustion and rate limits on massive datasets
+        max_download_workers = 10
+        max_processing_workers = os.cpu_count() or 4
+        # Uploads are network-bound (OpenAI embeds and indexes server-side), so more can overlap
+        max_upload_workers = 20
         
-        logger.info(f"Initiating concurrent batch processing with {max_concurrent_tasks} max workers...")
-
-        # Create asynchronous tasks for all files
-        tasks = [
-            self._process_single_file(file, vector_store_id, semaphore)
-            for file in files
-        ]
+        logger.info(
+            f"Initiating pipelined batch processing with {max_download_workers} download, "
+            f"{max_processing_workers} processing and {max_upload_workers} upload workers..."
+        )
+
+        counts = {"succeeded": 0, "failed": 0}
+        pending_records: List[Tuple[str, str, str]] = []
+
+        download_q: asyncio.Queue = asyncio.Queue()
+        for file in files:
+            download_q.put_nowait({'file': file})
+        for _ in range(max_download_workers):
+            download_q.put_nowait(None)
+
+        # Small hand-off queues: a slow stage applies backpressure upstream and caps in-flight payloads
+        process_q: asyncio.Queue = asyncio.Queue(maxsize=max_processing_workers)
+        # Deep enough for a backlog to form one full Vector Store file batch
+        upload_batch_size = self.openai.MAX_FILES_PER_BATCH
+        upload_q: asyncio.Queue = asyncio.Queue(maxsize=max(max_upload_workers, upload_batch_size))
 
-        # Execute all tasks concurrently and wait for completion
-        results = await asyncio.gather(*tasks)
+        try:
+            with ThreadPoolExecutor(max_workers=max_upload_workers, thread_name_prefix="vs-upload") as upload_pool:
+                upload_stage = partial(
+                    self._upload_stage,
+                    vector_store_id=vector_store_id,
+                    upload_pool=upload_pool,
+                    pending_records=pending_records
+                )
+                await asyncio.gather(
+                    self._run_stage(
+                        self._download_stage, max_download_workers,
+                        download_q, process_q, max_processing_workers, counts
+                    ),
+                    self._run_stage(
+                        self._processing_stage, max_processing_workers,
+                        process_q, upload_q, max_upload_workers, counts
+                    ),
+                    self._run_stage(
+                        upload_stage, max_upload_workers,
+                        upload_q, None, 0, counts, batch_size=upload_batch_size
+                    )
+                )
+        finally:
+            # Record the final partial group, even if the batch was interrupted, so uploaded files are not re-sent
+            await self._flush_processed_records(pending_records)
 
-        success_count = sum(1 for result in results if result is True)
-        fail_count = len(files) - success_count
+        success_count = counts["succeeded"]
+        fail_count = counts["failed"]
 
         logger.info(f"Batch Processing Summary: {success_count} Succeeded, {fail_count} Failed.")
\ No newline at end of file
@@ -20,7 +20,8 @@ def main():
         logger.info("   Version: 3.0 | Mode: Production")
         logger.info("="*60)
         
-        logger.info(f"Environment Configured. Database Path: {settings.DB_PATH}")
+        settings.validate_setup()
+        logger.info(f"Environment Configured. Database Path: {settings.db_path}")
         
         # 2. Initialize the Core Engine
         # This establishes connections to Google Drive and OpenAI
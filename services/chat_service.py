@@ -1,4 +1,6 @@
+import re
 import asyncio
+import random
 from openai import AsyncOpenAI
 from loguru import logger
 
@@ -6,12 +8,22 @@ from loguru import logger
 from config.settings import settings
 from api.schemas import ChatResponse
 
+# RCH (forensic citation) protocol markers, matched in a single pass over the response
+RCH_MARKERS = re.compile(r"Internal Pagination:|Searchable String:")
+# The markers always open an RCH answer, so only the head of very long responses is scanned
+RCH_SCAN_CHARS = 65536
+
 class ChatService:
     """
     Enterprise-grade asynchronous service to handle interactions with the 
     OpenAI Assistants API. Manages Threads, Messages, and Polling Runs securely.
     """
 
+    # Run polling backoff: start fast for short runs, back off for long ones
+    POLL_INITIAL_DELAY = 0.1
+    POLL_MAX_DELAY = 2.0
+    POLL_BACKOFF_FACTOR = 1.5
+
     def __init__(self):
         """
         Initializes the Native Async OpenAI client.
@@ -27,6 +39,33 @@ class ChatService:
         # It gets set by the SyncEngine during the initial ingestion phase.
         self.assistant_id = settings.OPENAI_ASSISTANT_ID
 
+    async def close(self):
+        """
+        Closes the underlying HTTP connection pool. Called once on API shutdown.
+        """
+        await self.client.close()
+
+    async def seed_cached_turn(self, query: str, response_text: str) -> str:
+        """
+        Creates a new thread pre-populated with a cached question/answer pair.
+        Lets a semantic cache hit skip the Assistant run while the conversation can still continue.
+
+        Args:
+            query (str): The user's input text.
+            response_text (str): The cached Assistant answer to record in the thread.
+
+        Returns:
+            str: The new Thread ID.
+        """
+        thread = await self.client.beta.threads.create(
+            messages=[
+                {"role": "user", "content": query},
+                {"role": "assistant", "content": response_text}
+            ]
+        )
+        logger.info(f"Created conversation thread from cached answer: {thread.id}")
+        return thread.id
+
     async def execute_chat_turn(self, query: str, thread_id: str = None) -> ChatResponse:
         """
         Executes a complete interaction cycle with the OpenAI Assistant.
@@ -63,9 +102,13 @@ class ChatService:
             )
 
             # 4. Asynchronous Polling Loop for Run Completion
-            # We sleep asynchronously to free up the CPU for other concurrent requests
+            # We sleep asynchronously to free up the CPU for other concurrent requests.
+            # Exponential backoff (0.1s -> 2s) picks up short runs quickly without spamming the API on long ones;
+            # +/-10% jitter keeps concurrent chat sessions from polling in lockstep.
+            delay = self.POLL_INITIAL_DELAY
             while run.status in ["queued", "in_progress", "cancelling"]:
-                await asyncio.sleep(1.0)  # Wait 1 second between checks
+                await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+                delay = min(delay * self.POLL_BACKOFF_FACTOR, self.POLL_MAX_DELAY)
                 run = await self.client.beta.threads.runs.retrieve(
                     thread_id=thread_id,
                     run_id=run.id
@@ -85,7 +128,8 @@ class ChatService:
 
                 # 6. Heuristic to Detect if the RCH Protocol was successfully triggered
                 # This helps the frontend switch from "Chat UI" to "Forensic Output UI"
-                is_rch = "Internal Pagination:" in response_text and "Searchable String:" in response_text
+                # Both distinct markers must be present (a repeated single marker does not count)
+                is_rch = len(set(RCH_MARKERS.findall(response_text, 0, RCH_SCAN_CHARS))) == 2
 
                 logger.success(f"Successfully processed response for thread: {thread_id}")
 
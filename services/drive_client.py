@@ -1,14 +1,19 @@
 import os
 import io
+import re
+import time
 import asyncio
 import aiohttp
 import aiofiles
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+from datetime import timezone
 
 # Third-party libraries
 from google.oauth2 import service_account
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
@@ -17,6 +22,15 @@ from loguru import logger
 # Internal modules
 from config.settings import settings
 
+# Anything that is not a (unicode) letter/digit, space, dot, underscore or hyphen is dropped from local filenames.
+# One C-level regex scan instead of a per-character Python loop.
+UNSAFE_FILENAME_CHARS = re.compile(r"[^\w .-]")
+
+# 8MB network reads/disk writes: far fewer await points and write syscalls per multi-GB PDF than 1MB
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Chunks buffered between the network reader and the disk writer (caps read-ahead RAM at ~32MB per download)
+DOWNLOAD_QUEUE_DEPTH = 4
+
 class DriveClient:
     """
     A robust, enterprise-grade wrapper for the Google Drive API v3.
@@ -25,6 +39,12 @@ class DriveClient:
 
     SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+    # Folder ids OR-ed into one listing query; keeps the query string well under Drive's URL length limit
+    LISTING_PARENTS_PER_QUERY = 50
+
+    # Access tokens are refreshed this many seconds before they actually expire
+    TOKEN_REFRESH_MARGIN_SECONDS = 60
+
     def __init__(self):
         """
         Initializes the Drive Client.
@@ -32,6 +52,12 @@ class DriveClient:
         """
         self.creds = None
         self.service = None
+        # Shared HTTP session (pooled keep-alive connections), created lazily inside the event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        # Cached access-token expiry (epoch seconds); 0 forces a refresh before the first download
+        self._token_expiry: float = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
         self._authenticate()
 
     def _authenticate(self):
@@ -55,6 +81,36 @@ class DriveClient:
             logger.critical(f"Failed to authenticate with Google Drive: {str(e)}")
             raise e
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared aiohttp session, creating it on first use.
+        Reusing one pooled connector lets concurrent downloads share TCP/TLS connections
+        to googleapis.com instead of paying a fresh handshake per file.
+        """
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=32,
+                    limit_per_host=16,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                )
+                # read_bufsize lets the response buffer actually fill DOWNLOAD_CHUNK_SIZE reads (default is 64KB)
+                self._session = aiohttp.ClientSession(connector=connector, read_bufsize=DOWNLOAD_CHUNK_SIZE)
+            return self._session
+
+    async def close(self):
+        """
+        Closes the shared HTTP session and its connection pool.
+        Safe to call repeatedly; the next download simply opens a new session.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -79,59 +135,181 @@ class DriveClient:
             raise ValueError("GOOGLE_DRIVE_FOLDER_ID is missing.")
 
         all_pdfs = []
+        seen_file_ids = set()
+        visited_folders = {target_folder_id}
+        frontier = [target_folder_id]
         logger.info(f"Starting recursive scan for PDFs in folder ID: {target_folder_id}")
 
-        # Offload the synchronous Google API discovery client walk to a background thread
-        await asyncio.to_thread(self._walk_folder_tree, target_folder_id, all_pdfs)
+        # Breadth-first walk: each tree level is listed with 'in parents' OR-queries covering
+        # LISTING_PARENTS_PER_QUERY folders each, issued concurrently from worker threads.
+        # Round-trips drop from one per folder to roughly one per level and 50 folders.
+        while frontier:
+            parent_groups = [
+                frontier[start:start + self.LISTING_PARENTS_PER_QUERY]
+                for start in range(0, len(frontier), self.LISTING_PARENTS_PER_QUERY)
+            ]
+            level_results = await asyncio.gather(*[
+                asyncio.to_thread(self._list_children, parent_ids)
+                for parent_ids in parent_groups
+            ])
+
+            frontier = []
+            for items in level_results:
+                for item in items:
+                    if item['mimeType'] == 'application/vnd.google-apps.folder':
+                        # Next level: Dive into subfolder
+                        if item['id'] not in visited_folders:
+                            visited_folders.add(item['id'])
+                            frontier.append(item['id'])
+                    elif item['id'] not in seen_file_ids:
+                        # It is a PDF (based on query filter); a file with several parents is listed once
+                        seen_file_ids.add(item['id'])
+                        all_pdfs.append({
+                            'id': item['id'],
+                            'name': item['name'],
+                            'md5Checksum': item.get('md5Checksum'), # Crucial for sync logic
+                            'size': int(item.get('size') or 0) # Bytes; drives the in-memory vs on-disk download choice
+                        })
         
-        logger.info(f"Scan complete. Found {len(all_pdfs)} PDF files in total.")
+        logger.info(f"Scan complete. Found {len(all_pdfs)} PDF files in {len(visited_folders)} folders.")
         return all_pdfs
 
-    def _walk_folder_tree(self, folder_id: str, pdf_accumulator: List[Dict[str, Any]]):
+    def _list_children(self, parent_ids: List[str]) -> List[Dict[str, Any]]:
         """
-        Internal helper to recursively walk the folder tree.
-        Separates 'folders' for traversal and 'files' for collection.
-        This remains synchronous but runs securely in a background thread.
+        Lists every sub-folder and PDF directly inside any of the given folders (all result pages).
+        This remains synchronous but runs securely in a background thread. The discovery client's
+        shared httplib2 connection is not thread-safe, so each call executes on its own AuthorizedHttp.
         """
+        http = AuthorizedHttp(self.creds, http=httplib2.Http())
+        parents_clause = " or ".join(f"'{parent_id}' in parents" for parent_id in parent_ids)
+        # Query: Not trashed AND (is folder OR is PDF) AND parent is one of the current folders
+        query = (
+            f"({parents_clause}) and trashed = false and "
+            f"(mimeType = 'application/vnd.google-apps.folder' or mimeType = 'application/pdf')"
+        )
+
+        children = []
         page_token = None
         
         while True:
             try:
-                # Query: Not trashed AND (is folder OR is PDF) AND parent is current folder
-                query = (
-                    f"'{folder_id}' in parents and trashed = false and "
-                    f"(mimeType = 'application/vnd.google-apps.folder' or mimeType = 'application/pdf')"
-                )
-                
                 results = self.service.files().list(
                     q=query,
                     pageSize=1000,
-                    fields="nextPageToken, files(id, name, mimeType, md5Checksum)",
+                    fields="nextPageToken, files(id, name, mimeType, md5Checksum, size)",
                     pageToken=page_token
-                ).execute()
-
-                items = results.get('files', [])
+                ).execute(http=http)
 
-                for item in items:
-                    if item['mimeType'] == 'application/vnd.google-apps.folder':
-                        # Recursive step: Dive into subfolder
-                        self._walk_folder_tree(item['id'], pdf_accumulator)
-                    else:
-                        # It is a PDF (based on query filter)
-                        pdf_accumulator.append({
-                            'id': item['id'],
-                            'name': item['name'],
-                            'md5Checksum': item.get('md5Checksum') # Crucial for sync logic
-                        })
+                children.extend(results.get('files', []))
 
                 page_token = results.get('nextPageToken')
                 if not page_token:
-                    break
+                    return children
 
             except HttpError as error:
-                logger.error(f"An error occurred while scanning folder {folder_id}: {error}")
+                logger.error(f"An error occurred while scanning folders {parent_ids}: {error}")
                 raise error
 
+    async def _ensure_token(self):
+        """
+        Makes sure the service account access token is valid for at least another
+        TOKEN_REFRESH_MARGIN_SECONDS, refreshing it proactively otherwise.
+        The fast path is a single float comparison against the cached expiry; refreshes run
+        under a lock, so any number of concurrent downloads coalesce into one token request.
+        """
+        if time.time() < self._token_expiry - self.TOKEN_REFRESH_MARGIN_SECONDS:
+            return
+
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+
+        async with self._token_lock:
+            # Re-check: another coroutine may have refreshed while this one waited on the lock
+            if time.time() < self._token_expiry - self.TOKEN_REFRESH_MARGIN_SECONDS:
+                return
+
+            await asyncio.to_thread(self.creds.refresh, Request())
+            # google-auth reports expiry as a naive UTC datetime
+            expiry = self.creds.expiry
+            self._token_expiry = expiry.replace(tzinfo=timezone.utc).timestamp() if expiry else 0.0
+
+    async def _media_request(self, file_id: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Builds the media download URL and auth headers for a file,
+        refreshing the service account token first if it is about to expire.
+        """
+        # Ensure credentials are valid and refreshed before requesting an access token
+        await self._ensure_token()
+
+        headers = {"Authorization": f"Bearer {self.creds.token}"}
+        
+        # Direct REST API endpoint for media download
+        url = f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
+        return url, headers
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type((aiohttp.ClientError, ConnectionError, TimeoutError)),
+        reraise=True
+    )
+    async def download_file_bytes(self, file_id: str, file_name: str) -> bytes:
+        """
+        Downloads a file from Google Drive straight into memory.
+        Used for small and medium PDFs so they can be parsed without a disk round-trip;
+        callers must keep large files on the streaming download_file path.
+
+        Args:
+            file_id (str): The Google Drive File ID.
+            file_name (str): The name of the file (used for logging).
+
+        Returns:
+            bytes: The raw file content.
+        """
+        url, headers = await self._media_request(file_id)
+
+        try:
+            session = await self._get_session()
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                data = await response.read()
+
+            logger.info(f"Successfully downloaded into memory: {file_name} ({len(data) / (1024 * 1024):.2f} MB)")
+            return data
+
+        except aiohttp.ClientError as e:
+            logger.error(f"Async HTTP error downloading file {file_name} (ID: {file_id}): {e}")
+            raise e
+
+    async def _stream_to_file(self, response: aiohttp.ClientResponse, file_path: str):
+        """
+        Copies a response body to disk with read-ahead double buffering.
+        A reader coroutine keeps pulling from the network while a writer coroutine flushes
+        earlier chunks to disk, joined by a bounded queue, so neither side stalls on the other.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=DOWNLOAD_QUEUE_DEPTH)
+
+        async def read_ahead():
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                await queue.put(chunk)
+            await queue.put(None)  # End-of-stream sentinel
+
+        async def write_behind():
+            # Asynchronous file writing (blocks larger than the write buffer go straight to the OS)
+            async with aiofiles.open(file_path, 'wb') as f:
+                while (chunk := await queue.get()) is not None:
+                    await f.write(chunk)
+
+        reader = asyncio.ensure_future(read_ahead())
+        writer = asyncio.ensure_future(write_behind())
+        try:
+            await asyncio.gather(reader, writer)
+        except BaseException:
+            # Never leave the surviving side blocked on the queue
+            reader.cancel()
+            writer.cancel()
+            raise
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -152,41 +330,28 @@ class DriveClient:
         Returns:
             str: The full local path of the downloaded file.
         """
-        # Ensure credentials are valid and refreshed before requesting an access token
-        if not self.creds.valid:
-            await asyncio.to_thread(self.creds.refresh, Request())
-            
-        access_token = self.creds.token
-        headers = {"Authorization": f"Bearer {access_token}"}
-        
-        # Direct REST API endpoint for media download
-        url = f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
+        url, headers = await self._media_request(file_id)
 
         # Sanitize filename to prevent OS errors
-        safe_filename = "".join([c for c in file_name if c.isalpha() or c.isdigit() or c in " ._-"])
+        safe_filename = UNSAFE_FILENAME_CHARS.sub("", file_name)
         file_path = os.path.join(destination_dir, safe_filename)
+        # Stream into a '.part' file and rename on success, so a half-written PDF is never visible under file_path
+        part_path = f"{file_path}.part"
 
         try:
             # Stream directly using async HTTP client to prevent RAM overload during 13GB ingestions
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    response.raise_for_status()
-                    
-                    # Asynchronous file writing
-                    async with aiofiles.open(file_path, 'wb') as f:
-                        async for chunk in response.content.iter_chunked(1024 * 1024): # 1MB chunks
-                            await f.write(chunk)
+            session = await self._get_session()
+            async with session.get(url, headers=headers) as response:
+                # Kept: without it a Drive error page would be saved (and parsed) as the PDF
+                response.raise_for_status()
+                
+                await self._stream_to_file(response, part_path)
 
+            os.replace(part_path, file_path)
             logger.info(f"Successfully downloaded via async stream: {file_name} -> {file_path}")
             return file_path
 
-        except aiohttp.ClientError as e:
-            logger.error(f"Async HTTP error downloading file {file_name} (ID: {file_id}): {e}")
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            raise e
         except Exception as e:
-            logger.error(f"Unexpected error streaming {file_name}: {str(e)}")
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            logger.error(f"Failed to download {file_name} (ID: {file_id}): {str(e)}")
+            Path(part_path).unlink(missing_ok=True)
             raise e
\ No newline at end of file
@@ -0,0 +1,108 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Optional, Tuple
+import numpy as np
+from loguru import logger
+
+# Internal Modules
+from config.settings import settings
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Symmetric per-vector int8 quantization: v ~= q * scale, with q in [-127, 127].
+    Cuts a 1536-dim embedding from 6KB (float32) to 1.5KB.
+
+    Returns:
+        Tuple[np.ndarray, float]: (int8 codes, float32 scale factor)
+    """
+    scale = float(np.abs(vector).max()) / 127.0 or 1.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+def dequantize_int8(codes: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Inverse of quantize_int8, back to float32.
+    """
+    return codes.astype(np.float32) * np.float32(scale)
+
+class EmbeddingCache:
+    """
+    Persistent on-disk cache of embedding vectors, keyed by a content hash of the embedded text.
+    Backed by SQLite (WAL mode), so restarts reuse every vector ever computed instead of
+    paying for another embeddings API call on text that was already seen.
+    Vectors are stored int8-quantized with a float32 scale (a quarter of the disk of float32),
+    which keeps cosine similarity accurate to within ~0.001 for unit-length embeddings.
+    The model name is part of the key, so switching embedding models invalidates automatically.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            chunk_hash BLOB NOT NULL,
+            model      TEXT NOT NULL,
+            vector     BLOB NOT NULL,
+            PRIMARY KEY (chunk_hash, model)
+        )
+    """
+
+    # 128-bit content hash: collision-free in practice and half the index size of a full digest
+    HASH_DIGEST_SIZE = 16
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Opens (or creates) the cache database.
+        The connection is shared with worker threads; a threading lock serializes access to it.
+        """
+        self.db_path = db_path or settings.EMBEDDING_CACHE_PATH
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(self.SCHEMA)
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def content_hash(cls, text: str) -> bytes:
+        """
+        Returns the cache key for a piece of text (BLAKE2b, from the standard library).
+        """
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=cls.HASH_DIGEST_SIZE).digest()
+
+    def get(self, text: str, model: str) -> Optional[np.ndarray]:
+        """
+        Looks up the cached embedding of text for the given model.
+        Blocking; call through asyncio.to_thread from async code.
+
+        Returns:
+            Optional[np.ndarray]: The unit-length float32 vector, or None on a cache miss.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT vector FROM embeddings WHERE chunk_hash = ? AND model = ?",
+                (self.content_hash(text), model)
+            ).fetchone()
+
+        if row is None:
+            return None
+        # BLOB layout: 4-byte float32 scale followed by the int8 codes
+        scale = np.frombuffer(row[0], dtype=np.float32, count=1)[0]
+        vector = dequantize_int8(np.frombuffer(row[0], dtype=np.int8, offset=4), scale)
+        # Rounding shifts the norm slightly; renormalize so cached and fresh vectors share one scale
+        vector /= (np.linalg.norm(vector) or 1.0)
+        return vector
+
+    def put(self, text: str, model: str, vector: np.ndarray):
+        """
+        Stores an embedding as a float32 scale + int8 codes. Failures are logged, never raised:
+        a cache write must not break the request that produced the vector.
+        Blocking; call through asyncio.to_thread from async code.
+        """
+        try:
+            codes, scale = quantize_int8(np.asarray(vector, dtype=np.float32))
+            blob = np.float32(scale).tobytes() + codes.tobytes()
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (chunk_hash, model, vector) VALUES (?, ?, ?)",
+                    (self.content_hash(text), model, blob)
+                )
+        except Exception as e:
+            logger.warning(f"Failed to persist embedding to cache: {str(e)}")
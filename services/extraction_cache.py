@@ -0,0 +1,92 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import orjson
+from loguru import logger
+
+try:
+    # Optional C-accelerated codec (pip install zstandard); without it entries are stored as plain JSON
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Internal Modules
+from config.settings import settings
+from utils.file_utils import prune_cache_dir, touch_cache_entry
+
+class ExtractionCache:
+    """
+    On-disk, content-addressed cache of PyMuPDF extraction results.
+    Entries are keyed by the PDF's content fingerprint plus the extraction parameters, so an
+    unchanged document (re-synced, re-uploaded or retried after a failed upload) skips block
+    extraction entirely and a changed one can never be served stale.
+    Each entry is one orjson document, zstd-compressed when the optional package is installed,
+    written to a temp file and renamed into place so a crash never leaves a truncated entry.
+    The directory is capped at EXTRACTION_CACHE_MAX_MB: hits refresh an entry's mtime and
+    every write evicts the least recently used entries beyond the cap.
+    """
+
+    # zstd level 3: fast to write, and page text still compresses roughly 4x
+    ZSTD_LEVEL = 3
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Prepares the cache directory (created on first write).
+        """
+        self.cache_dir = Path(cache_dir or settings.EXTRACTION_CACHE_DIR)
+        self.suffix = ".json.zst" if zstandard is not None else ".json"
+        self.max_bytes = settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the cached page list for key, or None on a miss (or an unreadable entry).
+        Blocking; call through asyncio.to_thread from async code.
+        """
+        path = self._entry_path(key)
+        try:
+            payload = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read extraction cache entry {path.name}: {str(e)}")
+            return None
+
+        try:
+            if zstandard is not None:
+                payload = zstandard.ZstdDecompressor().decompress(payload)
+            pages = orjson.loads(payload)
+        except Exception as e:
+            logger.warning(f"Ignoring corrupt extraction cache entry {path.name}: {str(e)}")
+            return None
+
+        touch_cache_entry(path)
+        return pages
+
+    def put(self, key: str, pages: List[Dict[str, Any]]):
+        """
+        Persists the page list for key. Failures are logged, never raised:
+        a cache write must not fail the ingestion that produced the pages.
+        Blocking; call through asyncio.to_thread from async code.
+        """
+        try:
+            payload = orjson.dumps(pages)
+            if zstandard is not None:
+                payload = zstandard.ZstdCompressor(level=self.ZSTD_LEVEL).compress(payload)
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Atomic write: temp file in the same directory, then rename over the final name
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as tmp_file:
+                    tmp_file.write(payload)
+                os.replace(tmp_path, self._entry_path(key))
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            prune_cache_dir(self.cache_dir, self.max_bytes)
+        except Exception as e:
+            logger.warning(f"Failed to persist extraction cache entry: {str(e)}")
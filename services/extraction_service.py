@@ -1,94 +1,331 @@
 import os
 import re
+import math
 import asyncio
+import tempfile
 import fitz  # PyMuPDF
-from typing import List, Dict, Any
+import numpy as np
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 from loguru import logger
 
+# Internal Modules
+from config.settings import settings
+from services.extraction_cache import ExtractionCache
+from utils.blocksort import bucket_order
+from utils.file_utils import LOCAL_CHECKSUM_ALGO, calculate_file_fingerprint, new_checksum_hasher, size_in_mb, stat_regular_file
+
+# Bump whenever page extraction output changes, so cached results from older logic are never reused
+EXTRACTION_CACHE_VERSION = 2
+
+# Pages handled per worker process: below this, process start-up and IPC cost more than they save
+PAGES_PER_SEGMENT = 32
+
+# Standalone page-number line, compiled once at import time; matches "12", "- 12 -", "Page 12"
+PAGE_NUMBER = re.compile(r'(?:Page\s*)?-?\s*(\d+)\s*-?$', re.IGNORECASE)
+
+def _spill_to_temp_file(data: bytes) -> str:
+    """
+    Writes an in-memory PDF to a temp file once, so worker processes can each open it by path
+    instead of receiving a pickled copy of the whole document per segment. Caller removes the file.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+def _open_document(source: Union[str, bytes]) -> "fitz.Document":
+    """
+    Opens a PDF from a local path, or parses it in memory when source is the raw bytes.
+    """
+    return fitz.open(source) if isinstance(source, str) else fitz.open(stream=source, filetype="pdf")
+
+def _extract_segment(args: Tuple[Union[str, bytes], int, int, int]) -> List[Dict[str, Any]]:
+    """
+    Process-pool worker: extracts pages [start, end) of one PDF.
+    PyMuPDF documents cannot be shared across threads or processes, so every worker reopens
+    the source itself from disk (in-memory downloads are spilled to a temp file first).
+    Module-level so it can be pickled by ProcessPoolExecutor.
+
+    Args:
+        args: (source, start, end, min_block_chars)
+
+    Returns:
+        List[Dict]: Page dicts for the segment, in page order.
+    """
+    source, start, end, min_block_chars = args
+    doc = _open_document(source)
+    try:
+        return [_extract_page(doc, page_num, min_block_chars) for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+def _extract_page(doc: "fitz.Document", page_num: int, min_block_chars: int) -> Dict[str, Any]:
+    """
+    Geometrical block-level extraction of a single page.
+    """
+    page = doc.load_page(page_num)
+    
+    # Extract text as blocks: (x0, y0, x1, y1, "text", block_no, block_type)
+    # block_type 0 means text, 1 means image
+    # sort=True pre-orders blocks by exact position inside MuPDF's C layer (instead of content-stream order)
+    blocks = page.get_text("blocks", sort=True)
+    
+    # Filter out image blocks and extremely short garbage blocks (stripping each text exactly once)
+    texts, xs, ys = [], [], []
+    for b in blocks:
+        if b[6] == 0:
+            text = b[4].strip()
+            if len(text) > min_block_chars:
+                texts.append(text)
+                xs.append(b[0])
+                ys.append(b[1])
+
+    # Group blocks top-to-bottom, then left-to-right to accurately read multi-column academic papers
+    # Coordinates are rounded to 10pt buckets to group slightly misaligned lines properly.
+    # The sort is stable, so blocks sharing a bucket keep MuPDF's exact-position order;
+    # only this bucketing pass stays on our side (numba kernel, or one NumPy lexsort).
+    if len(texts) > 1:
+        order = bucket_order(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64))
+        texts = [texts[i] for i in order]
+
+    page_text = "\n\n".join(texts)
+
+    return {
+        "page_index": page_num,
+        "text": page_text,
+        # Heuristic internal page extraction straight from the sorted blocks (no rescan of page_text)
+        "internal_page_number": _guess_internal_pagination_from_lines(_iter_edge_lines(texts))
+    }
+
+# Lines at each end of a page that are checked for a standalone page number
+PAGE_NUMBER_EDGE_LINES = 5
+
+def _iter_edge_lines(texts: List[str], count: int = PAGE_NUMBER_EDGE_LINES) -> Iterator[str]:
+    """
+    Yields the first and then the last `count` lines of "\n\n".join(texts), read from the block
+    texts directly. Each join separator contributes one blank line, exactly as splitting the joined
+    page would. Lazy: when a header line already matches, the footer lines are never built.
+    """
+    produced = 0
+    for index, text in enumerate(texts):
+        if index:
+            yield ""
+            produced += 1
+        if produced >= count:
+            break
+        for line in text.split("\n", count - produced)[:count - produced]:
+            yield line
+            produced += 1
+        if produced >= count:
+            break
+
+    tail: List[str] = []
+    for index, text in enumerate(reversed(texts)):
+        if index:
+            tail.append("")
+        if len(tail) >= count:
+            break
+        tail.extend(reversed(text.rsplit("\n", count - len(tail))[-(count - len(tail)):]))
+        if len(tail) >= count:
+            break
+
+    # Bottom lines are collected bottom-up; yield them in page order without a reversed copy
+    for index in range(min(count, len(tail)) - 1, -1, -1):
+        yield tail[index]
+
+def _guess_internal_pagination_from_lines(lines: Iterable[str]) -> str:
+    """
+    Detects standalone page numbers usually found at the very top or bottom blocks.
+    Returns on the first match, so lazily produced candidates stop being generated there.
+    """
+    for line in lines:
+        # Matches formats like "12", "- 12 -", "Page 12"; match() is anchored at the start
+        match = PAGE_NUMBER.match(line.strip())
+        if match:
+            return match.group(1)
+    
+    return "Unknown"
+
 class ExtractionService:
     """
     Enterprise-grade PDF Text Extractor.
     Handles multi-column layouts, block sorting, and garbage filtering 
     found in complex maritime legal documents.
+    Large PDFs are sharded into contiguous page ranges parsed in parallel worker processes.
     """
 
-    def __init__(self):
+    def __init__(self, executor: Optional[Executor] = None):
+        """
+        Args:
+            executor (Optional[Executor]): Process pool used to shard large PDFs across cores.
+                Without one, every document is parsed in a single background thread.
+        """
         # Thresholds for filtering out noisy blocks (like page numbers in weird places or watermarks)
         self.min_block_chars = 10
+        self.executor = executor
+        # Content-addressed result cache: unchanged PDFs skip PyMuPDF entirely
+        self.cache = ExtractionCache() if settings.EXTRACTION_CACHE_ENABLED else None
 
-    async def extract_document(self, pdf_path: str) -> List[Dict[str, Any]]:
+    async def extract_document(self, pdf_path: str, fingerprint: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
         """
         Asynchronously extracts structured text and page metadata from a PDF.
-        Offloads the heavy CPU-bound PyMuPDF parsing to a background thread.
+        Offloads the heavy CPU-bound PyMuPDF parsing to worker processes (or a background thread).
 
         Args:
             pdf_path (str): Local path to the PDF file.
+            fingerprint (Optional[Tuple[str, str]]): Known (algo, checksum) of the file, e.g. the upload
+                sidecar or the Drive MD5. Used as the cache key so the PDF is not read and hashed again.
 
         Returns:
             List[Dict]: A list of dictionaries representing pages. 
                         Format: [{"page_index": 0, "text": "...", "internal_page_number": "..."}]
         """
-        if not os.path.exists(pdf_path):
+        # Single stat: existence, regular-file check and size for the log line
+        st = stat_regular_file(pdf_path)
+        if st is None:
             logger.error(f"Extraction failed. File not found: {pdf_path}")
             raise FileNotFoundError(f"Missing file for extraction: {pdf_path}")
 
-        logger.info(f"Starting advanced block-level extraction for {os.path.basename(pdf_path)}")
-        return await asyncio.to_thread(self._process_pdf_blocks, pdf_path)
+        logger.info(f"Starting advanced block-level extraction for {os.path.basename(pdf_path)} ({size_in_mb(st.st_size)} MB)")
+        return await self._extract(pdf_path, os.path.basename(pdf_path), fingerprint)
 
-    def _process_pdf_blocks(self, pdf_path: str) -> List[Dict[str, Any]]:
+    async def extract_document_bytes(
+        self, data: bytes, file_name: str, fingerprint: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Synchronous worker that performs geometrical block-level text extraction.
+        In-memory variant of extract_document for PDFs that were downloaded straight into RAM.
+        PyMuPDF parses the buffer directly, so the PDF never touches the disk.
+
+        Args:
+            data (bytes): Raw PDF content.
+            file_name (str): Original file name (used for logging).
+            fingerprint (Optional[Tuple[str, str]]): Known (algo, checksum) of data; skips re-hashing it.
+
+        Returns:
+            List[Dict]: Same page format as extract_document.
+        """
+        logger.info(f"Starting advanced block-level extraction for {file_name} (in-memory)")
+        return await self._extract(data, file_name, fingerprint)
+
+    async def _extract(
+        self, source: Union[str, bytes], label: str, fingerprint: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Serves the pages from the extraction cache when this exact content was extracted before;
+        otherwise extracts them and stores the result for next time.
+        """
+        if self.cache is None:
+            return await self._extract_pages(source, label)
+
+        cache_key, cached_pages = await asyncio.to_thread(self._cache_lookup, source, fingerprint)
+        if cached_pages is not None:
+            logger.info(f"Extraction cache hit for {label}: {len(cached_pages)} pages.")
+            return cached_pages
+
+        extracted_pages = await self._extract_pages(source, label)
+        if cache_key is not None:
+            await asyncio.to_thread(self.cache.put, cache_key, extracted_pages)
+        return extracted_pages
+
+    def _cache_lookup(
+        self, source: Union[str, bytes], fingerprint: Optional[Tuple[str, str]] = None
+    ) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]]]:
+        """
+        Fingerprints the document and probes the cache in one worker-thread hop.
+        The key combines the content fingerprint with everything that shapes the output.
+        A caller-supplied fingerprint is used as-is; the source is only hashed when none is given.
+
+        Returns:
+            Tuple: (cache key or None if the source cannot be fingerprinted, cached pages or None)
+        """
+        if fingerprint is not None:
+            algo, digest = fingerprint
+        elif isinstance(source, str):
+            fingerprint = calculate_file_fingerprint(source)
+            if fingerprint is None:
+                return None, None
+            algo, digest = fingerprint
+        else:
+            hasher = new_checksum_hasher()
+            hasher.update(source)
+            algo, digest = LOCAL_CHECKSUM_ALGO, hasher.hexdigest()
+
+        cache_key = f"{algo}-{digest}-{self.min_block_chars}-v{EXTRACTION_CACHE_VERSION}"
+        return cache_key, self.cache.get(cache_key)
+
+    async def _extract_pages(self, source: Union[str, bytes], label: str) -> List[Dict[str, Any]]:
+        """
+        Splits [0, page_count) into min(cpu_count, ceil(pages / PAGES_PER_SEGMENT)) contiguous segments
+        and extracts them concurrently in the process pool. Small documents (one segment) stay
+        on the single-thread path, where process IPC would cost more than it saves.
+        In-memory sources are spilled to a temp file once and sharded by path, so each segment task
+        pickles a path rather than the full PDF bytes.
         """
-        extracted_pages = []
+        page_count = await asyncio.to_thread(self._count_pages, source, label)
+        segments = min(os.cpu_count() or 1, math.ceil(page_count / PAGES_PER_SEGMENT))
+
+        if self.executor is None or segments <= 1:
+            return await asyncio.to_thread(self._process_pdf_blocks, source, label)
+
+        if isinstance(source, bytes):
+            temp_path = await asyncio.to_thread(_spill_to_temp_file, source)
+            try:
+                return await self._extract_segments(temp_path, label, page_count, segments)
+            finally:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+        return await self._extract_segments(source, label, page_count, segments)
+
+    async def _extract_segments(self, path: str, label: str, page_count: int, segments: int) -> List[Dict[str, Any]]:
+        """
+        Fans the page range of a path-backed PDF out to the process pool in contiguous segments.
+        """
+
+        seg_size = page_count // segments + 1
+        loop = asyncio.get_running_loop()
         try:
-            doc = fitz.open(pdf_path)
-
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Extract text as blocks: (x0, y0, x1, y1, "text", block_no, block_type)
-                # block_type 0 means text, 1 means image
-                blocks = page.get_text("blocks")
-                
-                # Filter out image blocks and extremely short garbage blocks
-                text_blocks = [b for b in blocks if b[6] == 0 and len(b[4].strip()) > self.min_block_chars]
-                
-                # Sort blocks top-to-bottom, then left-to-right to accurately read multi-column academic papers
-                # Round coordinates to group slightly misaligned lines properly
-                text_blocks.sort(key=lambda b: (round(b[1] / 10) * 10, round(b[0] / 10) * 10))
-
-                page_text = "\n\n".join([b[4].strip() for b in text_blocks])
-
-                # Heuristic internal page extraction from the sorted text
-                internal_page = self._guess_internal_pagination(page_text)
-
-                extracted_pages.append({
-                    "page_index": page_num,
-                    "text": page_text,
-                    "internal_page_number": internal_page
-                })
-
-            doc.close()
-            return extracted_pages
+            results = await asyncio.gather(*[
+                loop.run_in_executor(
+                    self.executor,
+                    _extract_segment,
+                    (path, start, min(start + seg_size, page_count), self.min_block_chars)
+                )
+                for start in range(0, page_count, seg_size)
+            ])
+        except Exception as e:
+            logger.error(f"PyMuPDF Extraction Error on {label}: {str(e)}")
+            raise e
+
+        # Segments are gathered in submission order, so flattening preserves page_index order
+        return [page for segment in results for page in segment]
 
+    def _count_pages(self, source: Union[str, bytes], label: str) -> int:
+        """
+        Opens the document just long enough to read its page count (only the xref is parsed).
+        """
+        try:
+            with _open_document(source) as doc:
+                return len(doc)
         except Exception as e:
-            logger.error(f"PyMuPDF Extraction Error on {pdf_path}: {str(e)}")
+            logger.error(f"PyMuPDF Extraction Error on {label}: {str(e)}")
             raise e
 
-    def _guess_internal_pagination(self, page_text: str) -> str:
+    def _process_pdf_blocks(self, source: Union[str, bytes], label: str) -> List[Dict[str, Any]]:
         """
-        Detects standalone page numbers usually found at the very top or bottom blocks.
+        Synchronous single-thread worker that performs geometrical block-level text extraction.
+        Opens source from disk when it is a path, or parses it in memory when it is bytes.
         """
-        lines = page_text.split('\n')
-        if not lines:
-            return "Unknown"
+        try:
+            doc = _open_document(source)
+            try:
+                return [_extract_page(doc, page_num, self.min_block_chars) for page_num in range(len(doc))]
+            finally:
+                doc.close()
 
-        candidates = lines[:5] + lines[-5:]
-        for line in candidates:
-            clean_line = line.strip()
-            # Matches formats like "12", "- 12 -", "Page 12"
-            match = re.search(r'^(?:Page\s*)?-?\s*(\d+)\s*-?$', clean_line, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return "Unknown"
\ No newline at end of file
+        except Exception as e:
+            logger.error(f"PyMuPDF Extraction Error on {label}: {str(e)}")
+            raise e
@@ -1,6 +1,10 @@
 import os
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 # Third-party libraries
 from openai import OpenAI, APIConnectionError, RateLimitError, APIError
@@ -10,6 +14,51 @@ from loguru import logger
 # Internal modules
 from config.settings import settings
 
+class VectorStoreUploadError(Exception):
+    """
+    Raised when OpenAI accepts a Vector Store upload request but does not index the file(s).
+    """
+
+class _IdCache:
+    """
+    Tiny JSON sidecar remembering resolved OpenAI resource IDs by kind and name,
+    e.g. {"vector_store": {"SCAPILE Knowledge Base": "vs_..."}, "assistant": {...}}.
+    Lets warm starts verify one known ID instead of paging through list() and scanning names.
+    A missing or unreadable file simply behaves as an empty cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, kind: str, name: str) -> Optional[str]:
+        with self._lock:
+            return self._read().get(kind, {}).get(name)
+
+    def set(self, kind: str, name: str, resource_id: Optional[str]):
+        """
+        Stores (or, with resource_id=None, forgets) an ID. Written atomically; failures are only logged.
+        """
+        with self._lock:
+            data = self._read()
+            if resource_id is None:
+                data.get(kind, {}).pop(name, None)
+            else:
+                data.setdefault(kind, {})[name] = resource_id
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.path.resolve().parent, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                    json.dump(data, tmp_file, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not persist OpenAI ID cache {self.path}: {str(e)}")
+
 class OpenAIClient:
     """
     Enterprise wrapper for OpenAI Assistants API v2.
@@ -21,6 +70,11 @@ class OpenAIClient:
     ASSISTANT_NAME = "SCAPILE - Maritime Law Expert"
     VECTOR_STORE_NAME = "SCAPILE Knowledge Base"
 
+    # Files sent per Vector Store file batch: one create_and_poll round-trip indexes the whole group
+    MAX_FILES_PER_BATCH = 32
+    # Concurrent files.create uploads within one batch (the SDK's upload_and_poll default)
+    FILE_UPLOAD_CONCURRENCY = 5
+
     def __init__(self):
         """
         Initializes the OpenAI Client.
@@ -32,6 +86,9 @@ class OpenAIClient:
 
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.instructions_path = Path("assets/system_instructions.txt")
+        # (st_mtime_ns, content) of the last successful instructions read
+        self._instructions_cache: Optional[Tuple[int, str]] = None
+        self.id_cache = _IdCache(settings.OPENAI_ID_CACHE_PATH)
         
         logger.info(f"OpenAI Client initialized. Target Model: {self.MODEL_VERSION}")
 
@@ -39,15 +96,23 @@ class OpenAIClient:
         """
         Reads the 'Gold' instructions from the assets folder.
         This ensures the RCH Protocol & Hierarchy are always up to date.
+        The content is cached against the file's mtime: an unchanged file costs one stat() call,
+        while an edited file is picked up on the next call.
         """
         try:
-            if not self.instructions_path.exists():
+            try:
+                mtime_ns = self.instructions_path.stat().st_mtime_ns
+            except FileNotFoundError:
                 raise FileNotFoundError(f"System instructions file not found at: {self.instructions_path}")
+
+            if self._instructions_cache and self._instructions_cache[0] == mtime_ns:
+                return self._instructions_cache[1]
             
             content = self.instructions_path.read_text(encoding="utf-8")
             if not content.strip():
                 raise ValueError("System instructions file is empty.")
             
+            self._instructions_cache = (mtime_ns, content)
             return content
         except Exception as e:
             logger.critical(f"Failed to load system instructions: {str(e)}")
@@ -60,7 +125,7 @@ class OpenAIClient:
     )
     def ensure_vector_store(self) -> str:
         """
-        Checks if a Vector Store exists (via ID in settings or Name search).
+        Checks if a Vector Store exists (via ID in settings, the local ID cache, or Name search).
         If not, creates a new one.
         
         Returns:
@@ -76,20 +141,32 @@ class OpenAIClient:
             except Exception:
                 logger.warning(f"Configured Vector Store ID {settings.OPENAI_VECTOR_STORE_ID} is invalid. Searching by name...")
 
-        # 2. Search by Name to prevent duplicates
+        # 2. Check the ID resolved on a previous run (one retrieve instead of a paginated list)
+        cached_id = self.id_cache.get("vector_store", self.VECTOR_STORE_NAME)
+        if cached_id:
+            try:
+                self.client.vector_stores.retrieve(cached_id)
+                logger.info(f"Using cached Vector Store ID: {cached_id}")
+                return cached_id
+            except Exception:
+                logger.warning(f"Cached Vector Store ID {cached_id} is no longer valid. Searching by name...")
+                self.id_cache.set("vector_store", self.VECTOR_STORE_NAME, None)
+
+        # 3. Search by Name to prevent duplicates
         vector_stores = self.client.vector_stores.list(limit=50)
         for store in vector_stores.data:
             if store.name == self.VECTOR_STORE_NAME:
                 logger.success(f"Found existing Vector Store: {store.name} ({store.id})")
+                self.id_cache.set("vector_store", self.VECTOR_STORE_NAME, store.id)
                 return store.id
 
-        # 3. Create New if not found
+        # 4. Create New if not found
         logger.info(f"Creating new Vector Store: {self.VECTOR_STORE_NAME}")
         new_store = self.client.vector_stores.create(name=self.VECTOR_STORE_NAME)
         logger.success(f"Created new Vector Store with ID: {new_store.id}")
         
-        # NOTE: In a full production env, we would write this ID back to .env or a DB.
-        # For now, the Sync Engine will hold it in memory or user must update .env.
+        # Remembered in the local ID cache, so later runs reuse it even without updating .env
+        self.id_cache.set("vector_store", self.VECTOR_STORE_NAME, new_store.id)
         return new_store.id
 
     @retry(
@@ -97,47 +174,146 @@ class OpenAIClient:
         wait=wait_exponential(multiplier=1, min=4, max=20),
         retry=retry_if_exception_type((APIConnectionError, RateLimitError))
     )
-    def upload_file_to_store(self, file_path: str, vector_store_id: str) -> str:
+    def upload_file_to_store(self, file_tuple: Tuple[str, bytes], vector_store_id: str) -> str:
         """
-        Uploads a local file to the OpenAI Vector Store.
+        Uploads an in-memory file to the OpenAI Vector Store.
         Uses the 'upload_and_poll' helper for reliability.
-        In Phase 2.5, this now expects pre-processed, chunked, and metadata-enriched
-        text/markdown files rather than raw dense PDFs.
+        In Phase 2.5, this expects pre-processed, chunked, and metadata-enriched
+        text handed over as bytes, so nothing is written to or re-read from disk.
 
         Args:
-            file_path (str): Local path to the processed text/markdown file.
+            file_tuple (Tuple[str, bytes]): (file name, UTF-8 encoded processed text),
+                e.g. ('paper.pdf_processed.txt', b'...').
             vector_store_id (str): Target Vector Store ID.
 
         Returns:
             str: The OpenAI File ID or success status.
         """
-        file_path_obj = Path(file_path)
-        if not file_path_obj.exists():
-            raise FileNotFoundError(f"File to upload not found: {file_path}")
+        return self._upload_to_store(file_tuple[0], file_tuple, vector_store_id)
+
+    def upload_files_to_store(self, file_tuples: List[Tuple[str, bytes]], vector_store_id: str) -> List[bool]:
+        """
+        Uploads a group of in-memory files to the OpenAI Vector Store as ONE file batch.
+        Each file is uploaded exactly once (files.create, retried per file); only the batch
+        creation/polling step is retried as a whole, reusing the saved file IDs, so a transient
+        error while polling never re-uploads the group or orphans earlier copies.
+        N files cost one polling loop instead of N. Callers keep groups at or below MAX_FILES_PER_BATCH.
+
+        Args:
+            file_tuples (List[Tuple[str, bytes]]): (file name, UTF-8 encoded processed text) per file.
+            vector_store_id (str): Target Vector Store ID.
+
+        Returns:
+            List[bool]: Per-file success, aligned with file_tuples.
+        """
+        logger.info(f"Uploading batch of {len(file_tuples)} structured files to OpenAI Vector Store.")
 
-        logger.info(f"Uploading structured, pre-processed file to OpenAI Vector Store: {file_path_obj.name}")
+        # 1. Upload every file once; a file that still fails after retries is reported as failed
+        with ThreadPoolExecutor(max_workers=self.FILE_UPLOAD_CONCURRENCY) as executor:
+            file_ids = list(executor.map(self._create_file_or_none, file_tuples))
 
+        uploaded_ids = [file_id for file_id in file_ids if file_id is not None]
+        if not uploaded_ids:
+            return [False] * len(file_tuples)
+
+        # 2. Index the uploaded files in one batch (retried with the same file IDs)
         try:
-            # Create a file stream
-            with open(file_path_obj, "rb") as file_stream:
-                # Use the helper to upload and add to vector store in one go
-                # This automatically handles the "awaiting_processing" state
-                batch = self.client.vector_stores.file_batches.upload_and_poll(
-                    vector_store_id=vector_store_id,
-                    files=[file_stream]
-                )
+            batch = self._create_batch_and_poll(vector_store_id, uploaded_ids)
+        except Exception as e:
+            logger.error(f"Failed to index batch of {len(uploaded_ids)} files in Vector Store: {str(e)}")
+            self._delete_files(uploaded_ids)
+            return [False] * len(file_tuples)
+
+        if batch.status == "completed" and batch.file_counts.completed == len(uploaded_ids):
+            logger.success(f"Successfully uploaded and indexed batch of {len(uploaded_ids)} files.")
+            return [file_id is not None for file_id in file_ids]
+
+        # 3. Partial failure (rare): vector store file ids are the uploaded file ids, so match on ID
+        #    (file names are not unique: same-named PDFs in different Drive folders share one)
+        indexed_ids = {
+            vs_file.id
+            for vs_file in self.client.vector_stores.file_batches.list_files(
+                batch.id, vector_store_id=vector_store_id, filter="completed", limit=100
+            )
+        }
+        logger.warning(
+            f"Only {batch.file_counts.completed} of {len(file_tuples)} files in the batch were indexed "
+            f"(batch status: {batch.status}, {batch.file_counts.failed} failed)."
+        )
+        self._delete_files([file_id for file_id in uploaded_ids if file_id not in indexed_ids])
+        return [file_id is not None and file_id in indexed_ids for file_id in file_ids]
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=4, max=20),
+        retry=retry_if_exception_type((APIConnectionError, RateLimitError))
+    )
+    def _create_file(self, file_tuple: Tuple[str, bytes]) -> str:
+        """
+        Uploads one (name, bytes) file to OpenAI Files storage and returns its file ID.
+        """
+        return self.client.files.create(file=file_tuple, purpose="assistants").id
+
+    def _create_file_or_none(self, file_tuple: Tuple[str, bytes]) -> Optional[str]:
+        """
+        _create_file for batch uploads: a failure is logged and reported as None.
+        """
+        try:
+            return self._create_file(file_tuple)
+        except Exception as e:
+            logger.error(f"Failed to upload {file_tuple[0]} to OpenAI Files: {str(e)}")
+            return None
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=4, max=20),
+        retry=retry_if_exception_type((APIConnectionError, RateLimitError))
+    )
+    def _create_batch_and_poll(self, vector_store_id: str, file_ids: List[str]) -> Any:
+        """
+        Attaches already uploaded files to the Vector Store as one batch and polls until indexed.
+        """
+        return self.client.vector_stores.file_batches.create_and_poll(
+            vector_store_id=vector_store_id,
+            file_ids=file_ids
+        )
+
+    def _delete_files(self, file_ids: List[str]):
+        """
+        Best-effort removal of uploaded files that were not indexed, so they do not linger
+        in Files storage (the next sync uploads them again).
+        """
+        for file_id in file_ids:
+            try:
+                self.client.files.delete(file_id)
+            except Exception as e:
+                logger.warning(f"Could not delete orphaned file {file_id}: {str(e)}")
+
+    def _upload_to_store(self, display_name: str, payload: Any, vector_store_id: str) -> str:
+        """
+        Upload worker: sends one (name, bytes) file tuple and polls until it is indexed.
+        """
+        logger.info(f"Uploading structured, pre-processed file to OpenAI Vector Store: {display_name}")
+
+        try:
+            # Use the helper to upload and add to vector store in one go
+            # This automatically handles the "awaiting_processing" state
+            batch = self.client.vector_stores.file_batches.upload_and_poll(
+                vector_store_id=vector_store_id,
+                files=[payload]
+            )
             
             if batch.status == "completed" and batch.file_counts.completed > 0:
                 # Retrieve the file ID (since we uploaded a batch of 1, we fetch files from the store to get the ID)
                 # Optimization: We return a success status. The caller often just needs to know it worked.
                 # If exact ID is needed, we would list files in batch, but upload_and_poll returns a Batch object.
-                logger.success(f"Successfully uploaded and indexed structured payload: {file_path_obj.name}")
+                logger.success(f"Successfully uploaded and indexed structured payload: {display_name}")
                 return "upload_success"
             else:
-                raise APIError(f"File upload failed with status: {batch.status}")
+                raise VectorStoreUploadError(f"File upload failed with status: {batch.status}")
 
         except Exception as e:
-            logger.error(f"Failed to upload {file_path_obj.name} to Vector Store: {str(e)}")
+            logger.error(f"Failed to upload {display_name} to Vector Store: {str(e)}")
             raise e
 
     @retry(
@@ -178,7 +354,24 @@ class OpenAIClient:
             except Exception as e:
                 logger.warning(f"Could not update configured Assistant {assistant_id}: {e}. Searching by name...")
 
-        # 2. Search by Name (if ID missing or invalid)
+        # 2. Update the ID resolved on a previous run (the update call doubles as the liveness check)
+        cached_id = self.id_cache.get("assistant", self.ASSISTANT_NAME)
+        if cached_id and cached_id != assistant_id:
+            try:
+                self.client.beta.assistants.update(
+                    assistant_id=cached_id,
+                    instructions=instructions,
+                    model=self.MODEL_VERSION,
+                    tools=[{"type": "file_search"}],
+                    tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}}
+                )
+                logger.success(f"Cached Assistant {cached_id} updated successfully.")
+                return cached_id
+            except Exception as e:
+                logger.warning(f"Could not update cached Assistant {cached_id}: {e}. Searching by name...")
+                self.id_cache.set("assistant", self.ASSISTANT_NAME, None)
+
+        # 3. Search by Name (if ID missing or invalid)
         my_assistants = self.client.beta.assistants.list(limit=20)
         for assistant in my_assistants.data:
             if assistant.name == self.ASSISTANT_NAME:
@@ -190,9 +383,10 @@ class OpenAIClient:
                     tools=[{"type": "file_search"}],
                     tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}}
                 )
+                self.id_cache.set("assistant", self.ASSISTANT_NAME, assistant.id)
                 return assistant.id
 
-        # 3. Create New Assistant
+        # 4. Create New Assistant
         logger.info(f"Creating NEW Assistant: {self.ASSISTANT_NAME}")
         new_assistant = self.client.beta.assistants.create(
             name=self.ASSISTANT_NAME,
@@ -201,5 +395,6 @@ class OpenAIClient:
             tools=[{"type": "file_search"}],
             tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}}
         )
+        self.id_cache.set("assistant", self.ASSISTANT_NAME, new_assistant.id)
         logger.success(f"Created new Assistant with ID: {new_assistant.id}")
         return new_assistant.id
\ No newline at end of file
@@ -0,0 +1,222 @@
+import json
+import asyncio
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+import numpy as np
+from openai import AsyncOpenAI
+from loguru import logger
+
+# Internal Modules
+from config.settings import settings
+from services.embedding_cache import EmbeddingCache, quantize_int8
+
+def _unit_scales(codes: np.ndarray) -> np.ndarray:
+    """
+    Per-row float32 scales that give each dequantized int8 row unit length, so the inner product
+    with a unit query is a true cosine similarity (not skewed by the quantization rounding).
+    """
+    norms = np.linalg.norm(codes.astype(np.float32), axis=-1)
+    return np.divide(1.0, norms, out=np.ones_like(norms), where=norms > 0).astype(np.float32)
+
+class CachedAnswer(NamedTuple):
+    """
+    A previously generated Assistant answer served from the semantic cache.
+    """
+    response_text: str
+    is_rch_triggered: bool
+    similarity: float
+
+class SemanticCache:
+    """
+    In-memory semantic response cache placed in front of the OpenAI Assistants API.
+    Incoming queries are embedded and compared (cosine similarity) against prior queries;
+    a close enough match returns the stored answer in ~1ms instead of a multi-second Assistant run.
+    Vectors are held int8-quantized (per-row float32 scale, chosen so every dequantized row is
+    unit length) in a single contiguous matrix: 1.5KB
+    instead of 6KB per entry, so 4x more answers fit in the same RAM and memory bandwidth.
+    Once max_entries is reached the matrix acts as a ring buffer and the oldest answers are overwritten.
+    Entries are tagged with the corpus version they were answered against; when ingestion changes
+    the corpus the whole cache is dropped, so answers never outlive the documents they cite.
+    """
+
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    EMBEDDING_DIM = 1536
+
+    # Rows dequantized per matrix-vector product; bounds the float32 scratch buffer to ~12MB
+    SEARCH_BLOCK_ROWS = 2048
+
+    def __init__(self):
+        """
+        Initializes the cache and restores any snapshot persisted by a previous process.
+        """
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.cache_path = Path(settings.SEMANTIC_CACHE_PATH)
+        self.embedding_cache = EmbeddingCache()
+
+        # Pre-allocated int8 matrix + per-row scales; only the first len(self._answers) rows are live
+        self._vectors = np.empty((0, self.EMBEDDING_DIM), dtype=np.int8)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._answers: List[dict] = []
+        self._next_slot = 0  # Ring-buffer write position once the cache is full
+        self._corpus_version: Optional[str] = None  # Corpus the live entries were answered against
+        self._load()
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """
+        Embeds a query into a unit-length float32 vector.
+        Previously seen query texts are served from the persistent embedding cache without an API call.
+        Failures are logged and return None so the chat flow degrades to a normal Assistant run.
+        """
+        try:
+            cached = await asyncio.to_thread(self.embedding_cache.get, text, self.EMBEDDING_MODEL)
+            if cached is not None:
+                return cached
+
+            result = await self.client.embeddings.create(model=self.EMBEDDING_MODEL, input=text)
+            vector = np.asarray(result.data[0].embedding, dtype=np.float32)
+            vector /= (np.linalg.norm(vector) or 1.0)
+
+            await asyncio.to_thread(self.embedding_cache.put, text, self.EMBEDDING_MODEL, vector)
+            return vector
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed, bypassing cache: {str(e)}")
+            return None
+
+    def sync_corpus_version(self, corpus_version: str):
+        """
+        Drops every entry if the ingested corpus changed since they were cached.
+        Snapshots written before versioning carry no version and are therefore dropped on first check.
+
+        Args:
+            corpus_version (str): Current fingerprint from DBManager.get_corpus_version().
+        """
+        if corpus_version == self._corpus_version:
+            return
+        if self._answers:
+            logger.info(f"Corpus changed ({self._corpus_version} -> {corpus_version}), invalidating semantic cache.")
+            self.clear()
+        self._corpus_version = corpus_version
+
+    def clear(self):
+        """
+        Drops every cached answer. Called after a successful ingestion and on corpus version changes.
+        """
+        self._vectors = np.empty((0, self.EMBEDDING_DIM), dtype=np.int8)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._answers = []
+        self._next_slot = 0
+
+    def search(self, vector: np.ndarray) -> Optional[CachedAnswer]:
+        """
+        Returns the most similar cached answer if its similarity clears the threshold.
+        Vectors are unit-normalized, so the inner product equals cosine similarity.
+        Rows are dequantized block by block and scaled once at the end (error < 0.001).
+        """
+        size = len(self._answers)
+        if not size:
+            return None
+
+        similarities = np.empty(size, dtype=np.float32)
+        for start in range(0, size, self.SEARCH_BLOCK_ROWS):
+            block = self._vectors[start:min(start + self.SEARCH_BLOCK_ROWS, size)]
+            similarities[start:start + len(block)] = block.astype(np.float32) @ vector
+        similarities *= self._scales[:size]
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+
+        if score < self.threshold:
+            return None
+
+        answer = self._answers[best]
+        logger.info(f"Semantic cache hit (similarity={score:.3f}).")
+        return CachedAnswer(answer["response_text"], answer["is_rch_triggered"], score)
+
+    def add(self, vector: np.ndarray, response_text: str, is_rch_triggered: bool, corpus_version: Optional[str] = None):
+        """
+        Stores a freshly generated answer. Beyond max_entries the oldest entry is overwritten.
+        The matrix grows by doubling, so inserts are amortized O(1) instead of copying all vectors.
+        An answer produced against an older corpus_version than the current one is discarded.
+        """
+        if corpus_version is not None and corpus_version != self._corpus_version:
+            logger.debug("Skipping semantic cache insert: corpus changed during the Assistant run.")
+            return
+
+        entry = {"response_text": response_text, "is_rch_triggered": is_rch_triggered}
+        codes, _ = quantize_int8(vector)
+        scale = _unit_scales(codes)
+        size = len(self._answers)
+
+        if size < self.max_entries:
+            if size == len(self._vectors):
+                capacity = min(max(2 * size, 256), self.max_entries)
+                grown = np.empty((capacity, self.EMBEDDING_DIM), dtype=np.int8)
+                grown[:size] = self._vectors[:size]
+                self._vectors = grown
+                self._scales = np.resize(self._scales, capacity)
+            self._vectors[size] = codes
+            self._scales[size] = scale
+            self._answers.append(entry)
+        else:
+            self._vectors[self._next_slot] = codes
+            self._scales[self._next_slot] = scale
+            self._answers[self._next_slot] = entry
+            self._next_slot = (self._next_slot + 1) % self.max_entries
+
+    async def close(self):
+        """
+        Closes the embeddings HTTP connection pool. Called once on API shutdown.
+        """
+        await self.client.close()
+
+    def save(self):
+        """
+        Persists the cache to disk (called on API shutdown).
+        Answers are stored as a JSON string inside the .npz, so loading never needs pickle.
+        """
+        try:
+            # Rotate the ring so entries are written oldest-first
+            vectors = np.roll(self._vectors[:len(self._answers)], -self._next_slot, axis=0)
+            scales = np.roll(self._scales[:len(self._answers)], -self._next_slot)
+            answers = self._answers[self._next_slot:] + self._answers[:self._next_slot]
+
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, "wb") as f:
+                np.savez(
+                    f, vectors=vectors, scales=scales, answers=np.array(json.dumps(answers)),
+                    corpus_version=np.array(self._corpus_version or "")
+                )
+            logger.info(f"Semantic cache persisted with {len(self._answers)} entries: {self.cache_path}")
+        except Exception as e:
+            logger.error(f"Failed to persist semantic cache: {str(e)}")
+
+    def _load(self):
+        """
+        Restores a persisted snapshot. A corrupt or incompatible file is ignored.
+        Float32 snapshots written before int8 quantization are quantized on load, and row scales
+        are recomputed so every restored vector is unit length.
+        The stored corpus version is restored so sync_corpus_version can drop stale snapshots.
+        """
+        if not self.cache_path.exists():
+            return
+
+        try:
+            with np.load(self.cache_path) as snapshot:
+                vectors = snapshot["vectors"]
+                answers = json.loads(str(snapshot["answers"]))
+                corpus_version = str(snapshot["corpus_version"]) if "corpus_version" in snapshot.files else ""
+                if vectors.dtype != np.int8:
+                    quantized = [quantize_int8(row)[0] for row in vectors.astype(np.float32)]
+                    vectors = np.array(quantized, dtype=np.int8).reshape(-1, self.EMBEDDING_DIM)
+
+            if vectors.shape != (len(answers), self.EMBEDDING_DIM):
+                raise ValueError(f"Snapshot shape {vectors.shape} does not match {len(answers)} answers.")
+
+            self._vectors = np.ascontiguousarray(vectors[-self.max_entries:], dtype=np.int8)
+            self._scales = _unit_scales(self._vectors)
+            self._answers = answers[-self.max_entries:]
+            self._corpus_version = corpus_version or None
+            logger.info(f"Semantic cache restored with {len(self._answers)} entries.")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable semantic cache snapshot {self.cache_path}: {str(e)}")
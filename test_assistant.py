@@ -47,22 +47,29 @@ def start_chat_session():
 
             print("⏳ SCAPILE is reading files and thinking...", end="\r")
 
-            # 2. Run the Assistant and wait for it to finish
-            run = client.beta.threads.runs.create_and_poll(
+            # 2. Run the Assistant and stream its answer as it is generated (SSE events)
+            # instead of polling until completion and then fetching the message list
+            with client.beta.threads.runs.stream(
                 thread_id=thread.id,
                 assistant_id=assistant_id
-            )
+            ) as stream:
+                printed_header = False
+                for text_delta in stream.text_deltas:
+                    if not printed_header:
+                        # Clear the thinking line once the first token arrives
+                        print(" " * 50, end="\r")
+                        print("🤖 SCAPILE:")
+                        printed_header = True
+                    print(text_delta, end="", flush=True)
+                run = stream.get_final_run()
 
-            # Clear the thinking line
-            print(" " * 50, end="\r") 
+            if not printed_header:
+                # Clear the thinking line
+                print(" " * 50, end="\r")
 
             # 3. Analyze the response status
             if run.status == 'completed':
-                messages = client.beta.threads.messages.list(thread_id=thread.id)
-                # The latest message is always at index 0
-                latest_message = messages.data[0].content[0].text.value
-                
-                print(f"🤖 SCAPILE:\n{latest_message}\n")
+                print("\n")
                 print("-" * 50)
                 
             elif run.status == 'failed':
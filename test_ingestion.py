@@ -1,5 +1,6 @@
 import sys
 import asyncio
+from config.settings import settings
 from logic.sync_engine import SyncEngine
 from loguru import logger
 
@@ -16,7 +17,8 @@ async def run_forensic_test():
     logger.info("🚀 STARTING ADVANCED FORENSIC INGESTION TEST 🚀")
     logger.info("==================================================")
     
-    # Engine initialize karo
+    # Paths validate karo, phir engine initialize karo
+    settings.validate_setup()
     engine = SyncEngine()
     
     # Process start karo (Ye Drive se file uthayega, chunk karega, aur metadata lagayega)
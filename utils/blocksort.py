@@ -0,0 +1,60 @@
+import numpy as np
+
+try:
+    # Optional JIT compiler (pip install numba); without it the NumPy lexsort path is used
+    import numba
+except ImportError:
+    numba = None
+
+# Block coordinates are grouped into buckets of this many points before ordering
+BUCKET_SIZE = 10.0
+
+def _bucket_order_numpy(x0: np.ndarray, y0: np.ndarray, bucket: float = BUCKET_SIZE) -> np.ndarray:
+    """
+    Reference implementation: stable order by (rounded y0 bucket, rounded x0 bucket).
+    np.rint rounds half-to-even, matching Python's round().
+    """
+    return np.lexsort((np.rint(x0 / bucket), np.rint(y0 / bucket)))
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _bucket_order_jit(x0: np.ndarray, y0: np.ndarray, bucket: float = BUCKET_SIZE) -> np.ndarray:
+        """
+        Compiled equivalent of _bucket_order_numpy: both buckets are packed into one int64 key
+        (y bucket major, x bucket minor, offset so any sign works), then stably argsorted.
+        One scalar loop and one sort instead of several ndarray temporaries per page.
+        No fastmath: the division and rounding must match NumPy bit-for-bit at bucket edges.
+        """
+        n = x0.shape[0]
+        x_bucket = np.empty(n, dtype=np.int64)
+        y_bucket = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            x_bucket[i] = np.int64(np.rint(x0[i] / bucket))
+            y_bucket[i] = np.int64(np.rint(y0[i] / bucket))
+
+        x_min = x_bucket.min()
+        x_span = x_bucket.max() - x_min + 1
+        keys = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            keys[i] = y_bucket[i] * x_span + (x_bucket[i] - x_min)
+        return np.argsort(keys, kind="mergesort")
+
+    # Warm-up at import: compiles (or loads the on-disk cache) before the first real page
+    _bucket_order_jit(np.zeros(2, dtype=np.float64), np.zeros(2, dtype=np.float64))
+
+def bucket_order(x0: np.ndarray, y0: np.ndarray) -> np.ndarray:
+    """
+    Returns the reading-order permutation of text blocks: top-to-bottom, then left-to-right,
+    on BUCKET_SIZE-point buckets so slightly misaligned lines group together. The sort is stable.
+    Uses the numba kernel when available, otherwise NumPy lexsort (identical results).
+
+    Args:
+        x0 (np.ndarray): float64 left edges of the blocks.
+        y0 (np.ndarray): float64 top edges of the blocks.
+
+    Returns:
+        np.ndarray: Indices that put the blocks in reading order.
+    """
+    if numba is not None:
+        return _bucket_order_jit(x0, y0)
+    return _bucket_order_numpy(x0, y0)
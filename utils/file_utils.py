@@ -1,41 +1,132 @@
 import hashlib
 import os
+import stat
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Tuple
 from loguru import logger
 
-def calculate_file_md5(file_path: str, chunk_size: int = 8192) -> Optional[str]:
+try:
+    # Optional SIMD/multi-threaded hasher (pip install blake3), 5-10x faster than MD5 on large files
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Algorithm used for fingerprints computed locally (uploads). Drive-synced files keep Drive's own MD5.
+# Without blake3, stdlib BLAKE2b (128-bit digest) still outpaces MD5 on 64-bit CPUs.
+LOCAL_CHECKSUM_ALGO = "blake3" if blake3 is not None else "blake2b"
+
+# Fingerprints are change-detection only (no security requirement), so digest width is capped at 128 bits
+FINGERPRINT_DIGEST_SIZE = 16
+
+# hashlib.file_digest (Python 3.11+) hashes a file object in C with its own read buffer
+HAS_FILE_DIGEST = hasattr(hashlib, "file_digest")
+
+def new_checksum_hasher() -> Any:
+    """
+    Returns an incremental hasher for LOCAL_CHECKSUM_ALGO.
+    Both variants expose the hashlib-style update()/hexdigest() interface.
+    """
+    if blake3 is not None:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.blake2b(digest_size=FINGERPRINT_DIGEST_SIZE)
+
+def stat_regular_file(file_path: str) -> Optional[os.stat_result]:
+    """
+    Stats file_path once and returns the result if it is a regular file, else None.
+    Replaces exists()/is_file()/getsize() chains, which each cost a stat round-trip
+    (expensive on SMB/NFS mounts); callers reuse st_size from the returned result.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+def size_in_mb(size_bytes: int) -> float:
+    """
+    Converts a byte count to Megabytes (MB), rounded for logging.
+    """
+    return round(size_bytes / (1024 * 1024), 2)
+
+def calculate_file_fingerprint(file_path: str, chunk_size: int = 1024 * 1024) -> Optional[Tuple[str, str]]:
+    """
+    Calculates the change-detection fingerprint of a local file with LOCAL_CHECKSUM_ALGO.
+    BLAKE3 memory-maps the file and hashes it with SIMD across all cores; the BLAKE2b fallback
+    streams through hashlib.file_digest (or a chunked loop on Python < 3.11).
+    The algorithm name is returned with the digest so it can be stored next to it.
+
+    Args:
+        file_path (str): Absolute or relative path to the file.
+        chunk_size (int): Byte size for reading stream in the fallback loop (default 1MB).
+
+    Returns:
+        Tuple[str, str]: (algo, hexdigest), or None if the file cannot be read.
+    """
+    path_obj = Path(file_path)
+    if stat_regular_file(file_path) is None:
+        logger.error(f"Cannot calculate fingerprint: File not found at {file_path}")
+        return None
+
+    try:
+        hasher = new_checksum_hasher()
+        if blake3 is not None:
+            hasher.update_mmap(path_obj)
+        elif HAS_FILE_DIGEST:
+            with open(path_obj, "rb", buffering=0) as f:
+                hasher = hashlib.file_digest(f, lambda: hasher)
+        else:
+            with open(path_obj, "rb") as f:
+                while chunk := f.read(chunk_size):
+                    hasher.update(chunk)
+        return LOCAL_CHECKSUM_ALGO, hasher.hexdigest()
+
+    except OSError as e:
+        logger.error(f"IO Error while fingerprinting file {file_path}: {str(e)}")
+        return None
+
+def calculate_file_md5(file_path: str, chunk_size: int = 1024 * 1024) -> Optional[str]:
     """
     Calculates the MD5 checksum of a local file to verify integrity.
     Uses chunked reading to handle large files (PDFs) without memory spikes.
+    On Python 3.11+ hashlib.file_digest streams the file through its own C buffer
+    (releasing the GIL around reads); older interpreters use a 1MB read loop.
 
     Args:
         file_path (str): Absolute or relative path to the file.
-        chunk_size (int): Byte size for reading stream (default 8KB).
+        chunk_size (int): Byte size for reading stream in the fallback loop (default 1MB).
 
     Returns:
         str: The MD5 hash string (hexdigest) or None if operation fails.
     """
     path_obj = Path(file_path)
 
-    # 1. Validation: Ensure file exists before attempting read
-    if not path_obj.exists():
+    # 1. Validation: Ensure file exists before attempting read (one stat covers both checks)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         logger.error(f"Cannot calculate hash: File not found at {file_path}")
         return None
-    
-    if not path_obj.is_file():
+    except OSError as e:
+        logger.error(f"IO Error while hashing file {file_path}: {str(e)}")
+        return None
+
+    if not stat.S_ISREG(st.st_mode):
         logger.error(f"Cannot calculate hash: Path is not a file {file_path}")
         return None
 
     # 2. Hashing: Stream processing
-    md5_hash = hashlib.md5()
-    
     try:
-        with open(path_obj, "rb") as f:
-            while chunk := f.read(chunk_size):
-                md5_hash.update(chunk)
-        
-        generated_hash = md5_hash.hexdigest()
+        if HAS_FILE_DIGEST:
+            # Unbuffered: file_digest does its own large reads, so a Python-level buffer is just an extra copy
+            with open(path_obj, "rb", buffering=0) as f:
+                generated_hash = hashlib.file_digest(f, "md5").hexdigest()
+        else:
+            md5_hash = hashlib.md5()
+            with open(path_obj, "rb") as f:
+                while chunk := f.read(chunk_size):
+                    md5_hash.update(chunk)
+            generated_hash = md5_hash.hexdigest()
+
         # logger.trace(f"MD5 calculated for {path_obj.name}: {generated_hash}")
         return generated_hash
 
@@ -46,17 +137,117 @@ def calculate_file_md5(file_path: str, chunk_size: int = 8192) -> Optional[str]:
         logger.critical(f"Unexpected error in file hashing: {str(e)}")
         return None
 
+def checksum_sidecar_path(file_path: str) -> str:
+    """
+    Returns the path of the sidecar file holding a precomputed checksum for file_path.
+    """
+    return f"{file_path}.checksum"
+
+def write_checksum_sidecar(file_path: str, checksum: str, algo: str = LOCAL_CHECKSUM_ALGO):
+    """
+    Persists a checksum computed while the file was being written (e.g. during upload streaming),
+    so ingestion can reuse it instead of re-reading the whole file from disk.
+    Stored as '<algo>:<hexdigest>'.
+    """
+    Path(checksum_sidecar_path(file_path)).write_text(f"{algo}:{checksum}", encoding="utf-8")
+
+def read_checksum_sidecar(file_path: str) -> Optional[Tuple[str, str]]:
+    """
+    Returns the (algo, checksum) stored next to file_path, or None if no valid sidecar exists.
+    """
+    try:
+        content = Path(checksum_sidecar_path(file_path)).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+    algo, _, checksum = content.partition(":")
+    if not checksum:
+        return None
+    return algo, checksum
+
+def touch_cache_entry(path: "Path | str"):
+    """
+    Marks a cache entry as recently used by bumping its mtime, the recency key of prune_cache_dir.
+    Best effort: a failed touch only makes the entry an earlier eviction candidate.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def prune_cache_dir(cache_dir: "Path | str", max_bytes: int) -> int:
+    """
+    Evicts the least recently used files (oldest mtime first) until cache_dir fits in max_bytes.
+    One scandir pass; in-flight '.tmp'/'.part' writes are neither counted nor removed.
+    A max_bytes of 0 or less disables the limit.
+
+    Returns:
+        int: Number of entries removed.
+    """
+    if max_bytes <= 0:
+        return 0
+
+    entries = []
+    total = 0
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith((".tmp", ".part")) or not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+    except FileNotFoundError:
+        return 0
+
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+
+    logger.info(f"Evicted {removed} least recently used entries from cache {cache_dir}.")
+    return removed
+
 def get_file_size_mb(file_path: str) -> float:
     """
     Returns file size in Megabytes (MB).
     Useful for logging and audit trails.
     """
     try:
-        size_bytes = os.path.getsize(file_path)
-        return round(size_bytes / (1024 * 1024), 2)
+        return size_in_mb(os.stat(file_path).st_size)
     except OSError:
         return 0.0
 
+class _FilenameTranslationTable(dict):
+    """
+    str.translate table for sanitize_filename: maps each disallowed codepoint to None.
+    Decisions are made lazily in __missing__ and memoized, so the full (non-BMP included)
+    Unicode range is covered exactly like the c.isalnum() check, while repeated
+    characters are resolved by a C-level dict lookup inside str.translate.
+    """
+
+    ALLOWED_PUNCTUATION = frozenset(" ._-")
+
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        # Allowed characters map to themselves; disallowed ones are deleted
+        self[codepoint] = codepoint if char.isalnum() or char in self.ALLOWED_PUNCTUATION else None
+        return self[codepoint]
+
+# Shared across calls; ASCII is resolved up front since it covers almost every Drive filename
+FILENAME_TRANSLATION = _FilenameTranslationTable()
+for _codepoint in range(128):
+    FILENAME_TRANSLATION[_codepoint]
+
 def sanitize_filename(filename: str) -> str:
     """
     Cleans a filename to ensure it is safe for the local filesystem.
@@ -68,6 +259,6 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         str: A safe, sanitized filename.
     """
-    # Keep only alphanumeric, dots, dashes, underscores, and spaces
-    safe_name = "".join(c for c in filename if c.isalnum() or c in " ._-")
+    # Keep only alphanumeric, dots, dashes, underscores, and spaces (one C-level translate pass)
+    safe_name = filename.translate(FILENAME_TRANSLATION)
     return safe_name.strip()
\ No newline at end of file
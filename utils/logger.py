@@ -1,7 +1,14 @@
+import os
 import sys
 from pathlib import Path
 from loguru import logger
 
+try:
+    # Optional (pip install zstandard): much faster than zip for compressing rotated log files
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # ---------------------------------------------------------------------------
 # ENTERPRISE LOGGING CONFIGURATION
 # ---------------------------------------------------------------------------
@@ -29,36 +36,57 @@ LOG_FORMAT = (
     "<level>{message}</level>"
 )
 
-# 4. Add Console Handler (Standard Error)
+# 4. Define Rotation Compression
+# Rotated segments are zstd-compressed at level 1 (multi-threaded) when the package is installed,
+# which is several times faster than zip at a similar ratio; otherwise gzip is used.
+def _compress_rotated_log(path: str):
+    """
+    loguru compression callable: writes '<path>.zst' and removes the uncompressed segment.
+    """
+    with open(path, "rb") as src, open(f"{path}.zst", "wb") as dst:
+        zstandard.ZstdCompressor(level=1, threads=-1).copy_stream(src, dst)
+    os.remove(path)
+
+LOG_COMPRESSION = _compress_rotated_log if zstandard is not None else "gz"
+
+# SCAPILE_ENV=prod turns off extended tracebacks and variable-value diagnosis on exceptions:
+# both walk every stack frame and repr its locals, which is costly (and leaky) in production.
+IS_PRODUCTION = os.getenv("SCAPILE_ENV", "").lower() == "prod"
+
+# 5. Add Console Handler (Standard Error)
 # Purpose: Real-time monitoring for the operator.
-# Level: INFO (Shows flow, success, warnings, and errors).
+# Level: INFO by default (Shows flow, success, warnings, and errors).
+# Production deployments can set LOG_CONSOLE_LEVEL=WARNING to skip formatting per-file progress lines.
+# ANSI colors only when stderr is a terminal; under systemd/Docker they would just be noise in the logs.
 logger.add(
     sys.stderr,
     format=LOG_FORMAT,
-    level="INFO",
-    colorize=True,
-    backtrace=True,
-    diagnose=True
+    level=os.getenv("LOG_CONSOLE_LEVEL", "INFO").upper(),
+    colorize=sys.stderr.isatty(),
+    backtrace=not IS_PRODUCTION,
+    diagnose=not IS_PRODUCTION
 )
 
-# 5. Add File Handler (Audit Trail)
+# 6. Add File Handler (Audit Trail)
 # Purpose: Persistent storage for debugging and history.
 # Level: DEBUG (Captures detailed variable states and low-level events).
 # Features:
 # - Rotation: Creates a new file every 10 MB.
 # - Retention: Deletes logs older than 30 days to save disk space.
-# - Compression: Zips old logs (e.g., .log.zip) to minimize storage footprint.
-# - Enqueue: Ensures thread-safe logging (async safe).
+# - Compression: zstd (or gzip) for old logs (e.g., .log.zst) to minimize storage footprint.
+# - Enqueue: Ensures thread-safe logging (async safe); formatting, writing and rotation
+#   happen on loguru's background thread, so callers never block on the sink.
 logger.add(
     LOG_DIR / "scapile_ops.log",
     rotation="10 MB",
     retention="30 days",
-    compression="zip",
+    compression=LOG_COMPRESSION,
     format=LOG_FORMAT,
     level="DEBUG",
     enqueue=True,
-    backtrace=True,
-    diagnose=True
+    serialize=False,
+    backtrace=not IS_PRODUCTION,
+    diagnose=not IS_PRODUCTION
 )
 
 # Expose the configured logger
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List
 from pydantic import BaseModel, Field, validator
 from loguru import logger
 
@@ -30,47 +30,145 @@ class MetadataInjector:
     preventing LLM hallucinations (e.g., confusing PDF Page 91 with Internal Page 59).
     """
 
-    @staticmethod
-    def inject_metadata(raw_chunk_text: str, metadata_dict: Dict[str, Any]) -> str:
-        """
-        Takes a raw chunk of text and appends a strictly formatted Markdown metadata block to the end.
-
-        Args:
-            raw_chunk_text (str): The raw text chunk extracted and segmented by SemanticChunker.
-            metadata_dict (Dict[str, Any]): Dictionary containing 'title', 'author', 'year', 'internal_page_number'.
+    # Fixed parts of the metadata block. This exact format trains the OpenAI Assistant
+    # to reliably extract these fields when the RCH protocol is triggered.
+    BLOCK_HEADER = (
+        "\n\n"
+        "--------------------------------------------------\n"
+        "**SOURCE METADATA FOR FORENSIC EXTRACTION:**\n"
+    )
+    BLOCK_FOOTER = "\n--------------------------------------------------\n"
 
-        Returns:
-            str: The enriched text chunk ready for Vector Store uploading.
+    @classmethod
+    def _document_prefix(cls, title: str, author: str, year: str) -> str:
+        """
+        Validates the document-level metadata and renders the block up to the page number.
         """
-        if not raw_chunk_text or not raw_chunk_text.strip():
-            logger.warning("Attempted to inject metadata into an empty text chunk. Skipping.")
-            return raw_chunk_text
-
-        # 1. Validate incoming metadata strictly through Pydantic
         try:
-            validated_meta = ChunkMetadata(**metadata_dict)
+            validated_meta = ChunkMetadata(title=title, author=author, year=year)
         except Exception as e:
             logger.error(f"Metadata validation failed. Using fallback 'Unknown' values. Error: {e}")
             validated_meta = ChunkMetadata()
 
-        # 2. Sanitize the raw chunk slightly to ensure clean separation
-        clean_text = raw_chunk_text.strip()
-
-        # 3. Construct the strict Markdown block
-        # This exact format trains the OpenAI Assistant to reliably extract these fields
-        # when the RCH protocol is triggered.
-        metadata_block = (
-            "\n\n"
-            "--------------------------------------------------\n"
-            "**SOURCE METADATA FOR FORENSIC EXTRACTION:**\n"
+        return (
+            f"{cls.BLOCK_HEADER}"
             f"Title: {validated_meta.title}\n"
             f"Author: {validated_meta.author}\n"
             f"Year: {validated_meta.year}\n"
-            f"Internal Pagination: {validated_meta.internal_page_number}\n"
-            "--------------------------------------------------\n"
+            "Internal Pagination: "
         )
 
-        # 4. Append and return
-        enriched_chunk = clean_text + metadata_block
-        
-        return enriched_chunk
\ No newline at end of file
+    @staticmethod
+    def _normalize_page_number(internal_page_number: Any) -> str:
+        """
+        Same normalization as ChunkMetadata.validate_page_number, without a model per chunk.
+        """
+        page = str(internal_page_number).strip() if internal_page_number else ""
+        return page or "Unknown"
+
+    @classmethod
+    def make_page_formatter(cls, title: str, author: str, year: str) -> Callable[[str, Any], str]:
+        """
+        Validates the document-level metadata ONCE and returns a fast per-chunk injector.
+        Title/author/year are identical for every chunk of a document, so the Pydantic validation
+        and the block prefix are built here; each call then only normalizes the page number
+        and concatenates strings.
+
+        Args:
+            title (str): Document title.
+            author (str): Document author(s).
+            year (str): Publication year.
+
+        Returns:
+            Callable[[str, Any], str]: formatter(raw_chunk_text, internal_page_number) -> enriched chunk.
+        """
+        prefix = cls._document_prefix(title, author, year)
+        footer = cls.BLOCK_FOOTER
+        normalize_page = cls._normalize_page_number
+
+        def format_chunk(raw_chunk_text: str, internal_page_number: Any) -> str:
+            if not raw_chunk_text or not raw_chunk_text.strip():
+                logger.warning("Attempted to inject metadata into an empty text chunk. Skipping.")
+                return raw_chunk_text
+
+            return raw_chunk_text.strip() + prefix + normalize_page(internal_page_number) + footer
+
+        return format_chunk
+
+    @classmethod
+    def make_page_formatter_bytes(cls, title: str, author: str, year: str) -> Callable[[str, Any], bytes]:
+        """
+        UTF-8 variant of make_page_formatter for byte sinks (the Vector Store upload).
+        The metadata prefix and footer are encoded once per document, so each chunk only
+        encodes its own text and page number instead of re-encoding the whole metadata block.
+
+        Returns:
+            Callable[[str, Any], bytes]: formatter(raw_chunk_text, internal_page_number) -> enriched UTF-8 chunk.
+        """
+        prefix = cls._document_prefix(title, author, year).encode("utf-8")
+        footer = cls.BLOCK_FOOTER.encode("utf-8")
+        normalize_page = cls._normalize_page_number
+
+        def format_chunk(raw_chunk_text: str, internal_page_number: Any) -> bytes:
+            if not raw_chunk_text or not raw_chunk_text.strip():
+                logger.warning("Attempted to inject metadata into an empty text chunk. Skipping.")
+                return (raw_chunk_text or "").encode("utf-8")
+
+            return b"".join((
+                raw_chunk_text.strip().encode("utf-8"),
+                prefix,
+                normalize_page(internal_page_number).encode("utf-8"),
+                footer
+            ))
+
+        return format_chunk
+
+    @classmethod
+    def make_page_writer(cls, title: str, author: str, year: str) -> Callable[[List[bytes], str, Any], None]:
+        """
+        Sink variant of make_page_formatter_bytes: instead of returning each enriched chunk as a
+        new bytes object, appends its pieces (text, shared prefix, page number, shared footer) to a
+        caller-provided buffer list, ready for a vectored os.writev. The chunk is never concatenated.
+
+        Returns:
+            Callable[[List[bytes], str, Any], None]: writer(buffers, raw_chunk_text, internal_page_number).
+        """
+        prefix = cls._document_prefix(title, author, year).encode("utf-8")
+        footer = cls.BLOCK_FOOTER.encode("utf-8")
+        normalize_page = cls._normalize_page_number
+
+        def write_chunk(buffers: List[bytes], raw_chunk_text: str, internal_page_number: Any):
+            if not raw_chunk_text or not raw_chunk_text.strip():
+                logger.warning("Attempted to inject metadata into an empty text chunk. Skipping.")
+                buffers.append((raw_chunk_text or "").encode("utf-8"))
+                return
+
+            # Everything is encoded before the single extend, so a failure never leaves a partial chunk
+            buffers.extend((
+                raw_chunk_text.strip().encode("utf-8"),
+                prefix,
+                normalize_page(internal_page_number).encode("utf-8"),
+                footer
+            ))
+
+        return write_chunk
+
+    @classmethod
+    def inject_metadata(cls, raw_chunk_text: str, metadata_dict: Dict[str, Any]) -> str:
+        """
+        Takes a raw chunk of text and appends a strictly formatted Markdown metadata block to the end.
+        One-off convenience wrapper; bulk callers should build make_page_formatter once per document.
+
+        Args:
+            raw_chunk_text (str): The raw text chunk extracted and segmented by SemanticChunker.
+            metadata_dict (Dict[str, Any]): Dictionary containing 'title', 'author', 'year', 'internal_page_number'.
+
+        Returns:
+            str: The enriched text chunk ready for Vector Store uploading.
+        """
+        formatter = cls.make_page_formatter(
+            metadata_dict.get("title", "Unknown"),
+            metadata_dict.get("author", "Unknown"),
+            metadata_dict.get("year", "Unknown")
+        )
+        return formatter(raw_chunk_text, metadata_dict.get("internal_page_number"))
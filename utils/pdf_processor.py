@@ -1,13 +1,215 @@
 import os
 import re
+import math
+import shutil
+import hashlib
 import asyncio
+import multiprocessing
 import fitz  # PyMuPDF: Industry standard for fast and accurate PDF parsing
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from loguru import logger
 
 # Internal modules
+from config.settings import settings
 from utils.metadata_injector import MetadataInjector
+from utils.file_utils import calculate_file_fingerprint, prune_cache_dir, touch_cache_entry
+
+# Standalone printed page numbers (e.g., "59", "- 59 -", "Page 59"); compiled once, used with match().
+# The outer \s* absorb surrounding whitespace (re's \s is str.isspace), so lines are matched without strip().
+PAGE_NUMBER = re.compile(r'\s*(?:Page\s*)?-?\s*(\d+)\s*-?\s*\Z', re.IGNORECASE)
+
+# Header/footer lines of a page searched for a printed page number
+PAGE_NUMBER_EDGE_LINES = 3
+
+# Separator of the "YYYY - Author - Title.pdf" naming convention
+FILENAME_SEPARATOR = " - "
+PDF_SUFFIX = ".pdf"
+
+# MuPDF text flags for plain-text pages: the "text" defaults minus ligature preservation, so
+# "ﬁ"/"ﬂ" come out as plain "fi"/"fl" (what users actually search for) and MuPDF skips keeping
+# ligature glyphs intact. Image blocks are never built: TEXT_PRESERVE_IMAGES is not in the set.
+PAGE_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES
+
+# Pages per worker segment: documents shorter than this are enriched by a single worker
+PAGES_PER_SEGMENT = 16
+
+# PyMuPDF text extraction stops scaling past a few processes (the workers contend on memory bandwidth)
+MAX_PAGE_WORKERS = 4
+
+# Output is written with raw os.writev calls: at most this many buffers (pages + spacers) per call,
+# well under the IOV_MAX of 1024 on Linux/macOS. Platforms without writev (Windows) use os.write.
+WRITEV_BATCH = 512
+HAS_WRITEV = hasattr(os, "writev")
+
+# Blank-line spacer written between pages (not after the last one)
+PAGE_SPACER = b"\n\n"
+
+# Pages with less text than this (stray marks, a lone page number) carry no content worth indexing
+MIN_PAGE_CHARS = 4
+
+# Content-addressed cache of finished '_processed.txt' outputs lives in settings.PROCESSED_CACHE_DIR.
+# Bump whenever the enriched output format changes, so stale cache entries are never served
+PROCESSED_CACHE_VERSION = 2
+
+@lru_cache(maxsize=1)
+def get_page_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide pool for page extraction, shared by every PDFProcessor instance.
+    All PyMuPDF parsing runs here (never in the shared asyncio thread pool), so concurrent
+    uploads are parsed in parallel instead of contending for the GIL.
+    Uses the 'spawn' start method so workers never inherit locks held by other threads.
+    Worker processes are started lazily on first use.
+    """
+    return ProcessPoolExecutor(
+        max_workers=min(os.cpu_count() or 1, MAX_PAGE_WORKERS),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+def _iter_edge_lines(text: str, count: int) -> Iterator[str]:
+    """
+    Yields the first `count` lines of text, then the last `count` lines (in page order).
+    Lines are located with find/rfind from each end, so only the header and footer are
+    touched: a bounded split() would still copy the whole remainder of the page.
+    Lazy: the footer is only scanned if no header line matched.
+    """
+    start = 0
+    for _ in range(count):
+        end = text.find('\n', start)
+        if end < 0:
+            yield text[start:]
+            break
+        yield text[start:end]
+        start = end + 1
+
+    bounds: List[Tuple[int, int]] = []
+    end = len(text)
+    for _ in range(count):
+        start = text.rfind('\n', 0, end)
+        bounds.append((start + 1, end))
+        if start < 0:
+            break
+        end = start
+
+    for start, end in reversed(bounds):
+        yield text[start:end]
+
+def _guess_internal_page_number(page_text: str) -> str:
+    """
+    Heuristic method to find printed page numbers in headers or footers.
+    Examines the first few and last few lines of the page text.
+    """
+    # Look at the top 3 and bottom 3 lines; the candidates are exactly lines[:3] + lines[-3:]
+    for line in _iter_edge_lines(page_text, PAGE_NUMBER_EDGE_LINES):
+        # No strip() copy per line: the pattern skips the whitespace itself, and a line without
+        # a leading "Page", dash or digit is rejected within its first few characters
+        match = PAGE_NUMBER.match(line)
+        if match:
+            return match.group(1)
+    
+    return "Unknown"
+
+def _enrich_pages_into(
+    doc: "fitz.Document",
+    start: int,
+    end: int,
+    meta_base: Dict[str, str],
+    buffers: List[bytes],
+    failed_pages: List[int]
+):
+    """
+    Extracts pages [start, end) of an open document and injects the metadata block into each,
+    appending the enriched pages to buffers as UTF-8 pieces, with PAGE_SPACER between pages.
+    Empty and near-empty pages (under MIN_PAGE_CHARS) are skipped before any metadata work.
+    A page that fails to extract is logged, recorded in failed_pages and skipped,
+    so one damaged page no longer discards every page already processed.
+    """
+    # Title/author/year never change within a document: validated and rendered once,
+    # per page only the page number is substituted
+    write_page = MetadataInjector.make_page_writer(meta_base["title"], meta_base["author"], meta_base["year"])
+
+    for pdf_page_num, page in enumerate(doc.pages(start, end), start):
+        # Rollback point: a page that fails midway leaves no spacer or partial pieces behind
+        page_start = len(buffers)
+        try:
+            # One TextPage with pinned flags, read in MuPDF's natural (unsorted) order
+            textpage = page.get_textpage(flags=PAGE_TEXT_FLAGS)
+            raw_text = textpage.extractText().strip()
+
+            if len(raw_text) < MIN_PAGE_CHARS:
+                continue  # Skip empty pages
+
+            # Attempt to find the printed page number
+            internal_page = _guess_internal_page_number(raw_text)
+
+            # Inject strict Markdown block into this specific page's text, straight into the buffers
+            if buffers:
+                buffers.append(PAGE_SPACER)
+            write_page(buffers, raw_text, internal_page)
+        except Exception as page_err:
+            del buffers[page_start:]
+            logger.warning(f"Skipping unreadable page {pdf_page_num + 1}: {str(page_err)}")
+            failed_pages.append(pdf_page_num)
+
+def _enrich_page_range(args: Tuple[str, int, int, Dict[str, str]]) -> Tuple[List[bytes], List[int]]:
+    """
+    Process-pool worker: enriches pages [start, end) of one PDF.
+    fitz.Document cannot be pickled, so every worker opens its own handle on the file.
+    Module-level so it can be pickled by ProcessPoolExecutor. The shared metadata prefix and
+    footer are the same bytes objects in every page, so pickle sends them once per segment.
+
+    Args:
+        args: (pdf_path, start, end, meta_base)
+
+    Returns:
+        Tuple[List[bytes], List[int]]: (UTF-8 write buffers of the segment, indexes of pages that failed)
+    """
+    pdf_path, start, end, meta_base = args
+    buffers: List[bytes] = []
+    failed_pages: List[int] = []
+    with fitz.open(pdf_path) as doc:
+        _enrich_pages_into(doc, start, end, meta_base, buffers, failed_pages)
+    return buffers, failed_pages
+
+def _iter_segments(results: Iterable[Tuple[List[bytes], List[int]]], failed_pages: List[int]) -> Iterator[List[bytes]]:
+    """
+    Yields the write buffers of worker segments in order, collecting their failed page indexes.
+    """
+    for segment_buffers, segment_failures in results:
+        failed_pages.extend(segment_failures)
+        yield segment_buffers
+
+def _write_all(fd: int, buffers: List[bytes]):
+    """
+    Writes buffers to a raw file descriptor in as few syscalls as possible, with no
+    intermediate concatenation or Python-level write buffer. Short writes are completed.
+    """
+    if not HAS_WRITEV:
+        for buffer in buffers:
+            view = memoryview(buffer)
+            while view:
+                view = view[os.write(fd, view):]
+        return
+
+    for batch_start in range(0, len(buffers), WRITEV_BATCH):
+        batch = buffers[batch_start:batch_start + WRITEV_BATCH]
+        written = os.writev(fd, batch)
+        if written < sum(map(len, batch)):
+            # Rare (signal, full disk): finish the remainder of the batch with plain writes
+            remainder = memoryview(b"".join(batch))[written:]
+            while remainder:
+                remainder = remainder[os.write(fd, remainder):]
+
+class _PendingDocument(NamedTuple):
+    """
+    A document whose page segments are queued on the page-extraction pool.
+    """
+    output_filepath: str
+    cache_path: Optional[Path]
+    page_count: int
+    futures: List[Future]
 
 class PDFProcessor:
     """
@@ -16,17 +218,25 @@ class PDFProcessor:
     and injects strict metadata blocks before the text reaches OpenAI's vector store.
     """
 
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         """
         Initializes the PDF Processor.
+
+        Args:
+            cache_dir (Optional[str]): Directory of the processed-output cache.
+                Defaults to settings.PROCESSED_CACHE_DIR; PROCESSED_CACHE_ENABLED=False disables it.
         """
         self.injector = MetadataInjector()
+        self.cache_dir = Path(cache_dir or settings.PROCESSED_CACHE_DIR) if settings.PROCESSED_CACHE_ENABLED else None
+        self.cache_max_bytes = settings.PROCESSED_CACHE_MAX_MB * 1024 * 1024
 
     async def process_pdf_for_vector_store(self, pdf_path: str, original_filename: str) -> Optional[str]:
         """
         Reads a raw PDF, processes it into a metadata-enriched text file, 
         and returns the path to the new text file.
-        Runs purely in a background thread to prevent async loop blocking.
+        PyMuPDF parsing runs in the dedicated page-extraction process pool; the background
+        thread only orchestrates (cache lookup, worker dispatch, streamed write), so the
+        event loop is never blocked. Single-file form of process_pdfs_batch.
 
         Args:
             pdf_path (str): The local path to the downloaded PDF.
@@ -35,94 +245,214 @@ class PDFProcessor:
         Returns:
             Optional[str]: Path to the newly generated .txt file, or None if failed.
         """
-        if not os.path.exists(pdf_path):
-            logger.error(f"Cannot process PDF. File not found at: {pdf_path}")
-            return None
+        results = await self.process_pdfs_batch([(pdf_path, original_filename)])
+        return results[0]
+
+    async def process_pdfs_batch(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Processes a burst of PDFs in one submission to the page-extraction pool.
+        The segments of every document are queued before any result is awaited, so the warm
+        workers stay busy across file boundaries instead of draining after each file,
+        and the whole batch costs a single thread hop.
 
-        # Offload CPU-heavy PDF parsing to a separate thread
-        processed_file_path = await asyncio.to_thread(self._extract_and_enrich, pdf_path, original_filename)
-        return processed_file_path
+        Args:
+            items (List[Tuple[str, str]]): (pdf_path, original_filename) pairs.
+
+        Returns:
+            List[Optional[str]]: Processed .txt path (or None on failure) per item, in input order.
+        """
+        # Offload orchestration to a separate thread; it hands the CPU-heavy parsing to worker processes.
+        # No exists() pre-check: a missing file is detected by the open itself (one syscall, no race).
+        return await asyncio.to_thread(self._extract_and_enrich_batch, items)
 
-    def _extract_and_enrich(self, pdf_path: str, original_filename: str) -> Optional[str]:
+    def _extract_and_enrich_batch(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
         """
         Synchronous worker function that handles the actual PyMuPDF processing.
-        Generates a .txt file alongside the original PDF.
+        Generates a .txt file alongside each original PDF. One failing document never affects the others.
+        """
+        pool = get_page_pool()
+
+        # Phase 1: cache lookups and worker dispatch for every document, before waiting on any
+        staged = [self._submit_document(pdf_path, original_filename, pool) for pdf_path, original_filename in items]
+
+        # Phase 2: stream each document's segments to disk, in input order
+        return [
+            self._finish_document(pdf_path, original_filename, stage) if isinstance(stage, _PendingDocument) else stage
+            for (pdf_path, original_filename), stage in zip(items, staged)
+        ]
+
+    def _submit_document(
+        self,
+        pdf_path: str,
+        original_filename: str,
+        pool: ProcessPoolExecutor
+    ) -> Union[_PendingDocument, str, None]:
+        """
+        Serves a document from the processed-output cache, or queues its page segments on the pool.
+
+        Returns:
+            The output path on a cache hit, a _PendingDocument once queued, or None on failure.
         """
         try:
-            doc = fitz.open(pdf_path)
-            
             # Basic heuristic to extract title and year from filename (e.g., "2009 - Mansell - Book.pdf")
             # In a full production system, this could query a master database.
             parsed_year, parsed_author, parsed_title = self._parse_filename_metadata(original_filename)
+            meta_base = {"title": parsed_title, "author": parsed_author, "year": parsed_year}
 
-            output_text = ""
-
-            for pdf_page_num in range(len(doc)):
-                page = doc.load_page(pdf_page_num)
-                raw_text = page.get_text("text").strip()
+            # Save the enriched text to a new file ready for OpenAI, streamed page by page
+            output_filepath = f"{pdf_path}_processed.txt"
 
-                if not raw_text:
-                    continue  # Skip empty pages
+            # Re-ingested content (retries, repeated uploads) is copied from the cache, not re-parsed
+            cache_path = self._cache_path(pdf_path, original_filename)
+            if cache_path is not None and cache_path.is_file():
+                self._copy_atomic(cache_path, output_filepath)
+                touch_cache_entry(cache_path)
+                logger.info(f"Processed-output cache hit for {original_filename}.")
+                return output_filepath
 
-                # Attempt to find the printed page number
-                internal_page = self._guess_internal_page_number(raw_text)
+            # Only the xref is parsed here, to size the work; the pages are read by the workers
+            with fitz.open(pdf_path) as doc:
+                page_count = len(doc)
 
-                # Prepare metadata dictionary for the injector
-                meta_dict = {
-                    "title": parsed_title,
-                    "author": parsed_author,
-                    "year": parsed_year,
-                    "internal_page_number": internal_page
-                }
+            # Contiguous page ranges, one per worker (a short document is a single range): each worker
+            # opens the file once. Results are consumed in submission order, so the first segment is
+            # written while the later ones are still being extracted, and page order is preserved.
+            segments = max(1, min(MAX_PAGE_WORKERS, os.cpu_count() or 1, math.ceil(page_count / PAGES_PER_SEGMENT)))
+            seg_size = page_count // segments + 1
+            futures = [
+                pool.submit(_enrich_page_range, (pdf_path, seg_start, min(seg_start + seg_size, page_count), meta_base))
+                for seg_start in range(0, page_count, seg_size)
+            ]
+            return _PendingDocument(output_filepath, cache_path, page_count, futures)
 
-                # Inject strict Markdown block into this specific page's text
-                enriched_page_text = self.injector.inject_metadata(raw_text, meta_dict)
-                
-                # Append to the final document payload
-                output_text += enriched_page_text + "\n\n"
+        except Exception as e:
+            return self._report_failure(e, pdf_path, original_filename)
 
-            doc.close()
+    def _finish_document(self, pdf_path: str, original_filename: str, pending: _PendingDocument) -> Optional[str]:
+        """
+        Streams the queued segments of one document into its output file and caches the result.
+        """
+        try:
+            failed_pages: List[int] = []
+            results = (future.result() for future in pending.futures)
+            self._write_pages(pending.output_filepath, _iter_segments(results, failed_pages))
 
-            # Save the enriched text to a new file ready for OpenAI
-            output_filepath = f"{pdf_path}_processed.txt"
-            with open(output_filepath, "w", encoding="utf-8") as f:
-                f.write(output_text)
+            if failed_pages:
+                # The readable pages are still delivered; the output is not cached, so a later run retries
+                logger.warning(f"{original_filename}: {len(failed_pages)} of {pending.page_count} pages could not be extracted.")
+            elif pending.cache_path is not None:
+                self._store_in_cache(pending.output_filepath, pending.cache_path)
 
             logger.info(f"Successfully processed and enriched PDF: {original_filename}")
-            return output_filepath
+            return pending.output_filepath
 
         except Exception as e:
-            logger.error(f"Failed to parse and enrich PDF {original_filename}: {str(e)}")
+            # Segments not yet started are dropped instead of occupying the pool
+            for future in pending.futures:
+                future.cancel()
+            return self._report_failure(e, pdf_path, original_filename)
+
+    @staticmethod
+    def _report_failure(error: Exception, pdf_path: str, original_filename: str) -> None:
+        """
+        Logs why a document could not be processed; always returns None (the failed result).
+        """
+        if isinstance(error, (FileNotFoundError, fitz.FileNotFoundError)):
+            logger.error(f"Cannot process PDF. File not found at: {pdf_path}")
+        else:
+            logger.error(f"Failed to parse and enrich PDF {original_filename}: {str(error)}")
+        return None
+
+    def _cache_path(self, pdf_path: str, original_filename: str) -> Optional[Path]:
+        """
+        Returns the cache entry for this PDF, or None when caching is off or the file cannot be read.
+        The key is the streamed content fingerprint (BLAKE3, else BLAKE2b) plus a digest of the
+        original filename: the injected Title/Author/Year come from the name, so the same bytes
+        uploaded under another name must not share an entry.
+        """
+        if self.cache_dir is None:
+            return None
+
+        fingerprint = calculate_file_fingerprint(pdf_path)
+        if fingerprint is None:
             return None
 
+        algo, digest = fingerprint
+        name_digest = hashlib.blake2b(original_filename.encode("utf-8"), digest_size=8).hexdigest()
+        return self.cache_dir / f"{algo}-{digest}-{name_digest}-v{PROCESSED_CACHE_VERSION}.txt"
+
+    def _store_in_cache(self, output_filepath: str, cache_path: Path):
+        """
+        Copies a finished output into the cache, then evicts the least recently used entries
+        beyond PROCESSED_CACHE_MAX_MB. Failures are logged, never raised:
+        a cache write must not fail the processing that produced the file.
+        """
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._copy_atomic(output_filepath, cache_path)
+            prune_cache_dir(cache_path.parent, self.cache_max_bytes)
+        except OSError as e:
+            logger.warning(f"Failed to persist processed-output cache entry: {str(e)}")
+
+    @staticmethod
+    def _copy_atomic(src: "Path | str", dst: "Path | str"):
+        """
+        Copies src to dst through a '.part' file next to dst and a rename,
+        so readers never observe a partially copied file.
+        """
+        part_path = f"{dst}.part"
+        try:
+            shutil.copyfile(src, part_path)
+            os.replace(part_path, dst)
+        except BaseException:
+            Path(part_path).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _write_pages(output_filepath: str, segments: Iterable[List[bytes]]):
+        """
+        Streams enriched pages into output_filepath, separated by a blank-line spacer.
+        Every segment is written as it arrives with vectored writes straight from the workers'
+        UTF-8 pieces, so neither a page nor the document is ever joined, encoded or buffered here.
+        The bytes go to a '.part' file that is renamed into place only once complete:
+        a failure midway never leaves a truncated '_processed.txt' behind.
+        """
+        part_path = f"{output_filepath}.part"
+        try:
+            fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                wrote_page = False
+                for segment_buffers in segments:
+                    if not segment_buffers:
+                        continue
+                    # Segments carry their own inner spacers; only the boundary between two is added here
+                    _write_all(fd, [PAGE_SPACER, *segment_buffers] if wrote_page else segment_buffers)
+                    wrote_page = True
+            finally:
+                os.close(fd)
+            os.replace(part_path, output_filepath)
+        except BaseException:
+            Path(part_path).unlink(missing_ok=True)
+            raise
+
     def _guess_internal_page_number(self, page_text: str) -> str:
         """
         Heuristic method to find printed page numbers in headers or footers.
         Examines the first few and last few lines of the page text.
         """
-        lines = page_text.split('\n')
-        if not lines:
-            return "Unknown"
-
-        # Look at the top 3 and bottom 3 lines
-        candidates = lines[:3] + lines[-3:]
-        
-        for line in candidates:
-            clean_line = line.strip()
-            # Regex to match standalone numbers (e.g., "59", "- 59 -", "Page 59")
-            match = re.search(r'^(?:Page\s*)?-?\s*(\d+)\s*-?$', clean_line, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return "Unknown"
+        return _guess_internal_page_number(page_text)
 
     def _parse_filename_metadata(self, filename: str) -> Tuple[str, str, str]:
         """
         Attempts to extract Year, Author, and Title from standard academic naming conventions.
         Format expected: "YYYY - Author - Title.pdf"
         """
-        clean_name = filename.replace(".pdf", "").strip()
-        parts = clean_name.split(" - ")
+        # Only a trailing extension is dropped (replace() also cut ".pdf" out of the middle of names)
+        if filename[-len(PDF_SUFFIX):].lower() == PDF_SUFFIX:
+            filename = filename[:-len(PDF_SUFFIX)]
+        clean_name = filename.strip()
+        # At most three fields: any further separators stay inside the title
+        parts = clean_name.split(FILENAME_SEPARATOR, 2)
         
         year = "Unknown"
         author = "Unknown"
@@ -131,7 +461,7 @@ class PDFProcessor:
         if len(parts) >= 3:
             year = parts[0].strip()
             author = parts[1].strip()
-            title = " - ".join(parts[2:]).strip()
+            title = parts[2].strip()
         elif len(parts) == 2:
             year = parts[0].strip()
             title = parts[1].strip()